@@ -1,6 +1,22 @@
 #!/usr/bin/env python3
+import argparse
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import io
+import json
+import os
 import pathlib
+import resource
 import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import (ALL_COMPLETED, FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
 import ffmpeg
 from PIL import Image
 import pillow_heif
@@ -21,62 +37,1222 @@ from tqdm import tqdm
 # mkdir ~/iPhone 
 # ifuse ~/iPhone
 
-## Copy files from DCIM folders in iPhone to local device
-# Must copy to local device before running
+## Either copy files from DCIM folders in iPhone to local device first, or read straight
+## from the mount with --stage-dir: a few reader threads copy files into a local staging
+## folder (read-ahead capped by --stage-mb) while earlier files are already converting.
+## Staged copies are deleted as soon as they are converted
+# python convert_media.py ~/iPhone/DCIM /path/to/output --jobs 8 --stage-dir /tmp --stage-mb 2048
 
 ### TO RUN ### (Ensure virtual enviornment is running)
 # python convert_media.py /path/to/input /path/to/output
+# python convert_media.py /path/to/input /path/to/output --jobs 8 --video-jobs 2
 
-def convert_media(input_folder, output_folder):
+## Re-running is incremental: a manifest in the output folder remembers what was
+## converted, so only new/changed files are processed and interrupted runs resume.
+# python convert_media.py /path/to/input /path/to/output --prune   # also drop outputs of deleted sources
+
+## Merged backups full of duplicates? --dedup converts each unique file once and
+## hardlinks (or reflinks) the output to every duplicate's location.
+# python convert_media.py /path/to/input /path/to/output --dedup
+
+## MOVs already in H.264/HEVC + AAC are remuxed into MP4 losslessly (no re-encode).
+## Force one path or the other with --video-mode remux|transcode (default: auto)
+
+## Other files are copied in-kernel (reflink / copy_file_range / sendfile) where possible.
+## --link hardlinks them instead (output then shares the source's inode)
+
+## Preview the scheduler's plan (cost estimates, lanes, ffmpeg threads) without converting
+# python convert_media.py /path/to/input /path/to/output --jobs 8 --schedule longest-first --dry-run
+
+## Several renditions per HEIC from a single decode (MAX_DIM or "full" : QUALITY or "default" : FORMAT).
+## Smaller renditions are named IMG_1234_2048.jpg etc. and resampled from the next larger one
+# python convert_media.py /path/to/input /path/to/output --rendition full:95:jpeg --rendition 2048:85:jpeg --rendition 320:80:webp
+
+## Every run ends with a per-stage/per-extension timing summary; the full JSON report is
+## written to .convert_report.json in the output folder (or --report PATH).
+## --trace writes a timeline you can open in chrome://tracing or https://ui.perfetto.dev
+# python convert_media.py /path/to/input /path/to/output --jobs 8 --trace trace.json
+
+## Long transcodes can be split into chunks that are encoded in parallel (frame for frame
+## the same as one encode: same frame count, timestamps and A/V offset)
+# python convert_media.py /path/to/input /path/to/output --video-mode transcode --segment-seconds 60
+
+## ffmpeg jobs run in the background with live progress (% / speed) on the progress bar.
+## --ffmpeg-timeout SECONDS kills stuck encodes; Ctrl-C stops every running ffmpeg cleanly
+
+# File types that get converted (everything else is copied as-is)
+HEIF_EXTS = (".heic", ".heif")
+VIDEO_EXTS = (".mov",)
+
+# Codecs that can be stream-copied from MOV into MP4 without re-encoding
+REMUX_VIDEO_CODECS = ("h264", "hevc")
+REMUX_AUDIO_CODECS = ("aac",)
+VIDEO_MODES = ("auto", "remux", "transcode")
+
+# x264 settings per --x264-profile ("default" keeps ffmpeg's own defaults)
+X264_PROFILES = {
+    "default": {},
+    "fast": {"preset": "veryfast", "crf": 23},
+    "balanced": {"preset": "medium", "crf": 21},
+    "quality": {"preset": "slow", "crf": 18},
+}
+
+# Rough CPU-seconds per unit of work, only used to rank jobs against each other
+IMAGE_COST_PER_MPIX = 0.05  # HEIC decode + JPEG encode, per megapixel
+VIDEO_COST_PER_MPIX = 0.05  # x264 encode, per megapixel of every frame
+COPY_COST_PER_MB = 0.002  # copies and remuxes
+SCHEDULES = ("stream", "longest-first")
+
+# Actions reported for pass-through files (see copy_file)
+COPY_ACTIONS = ("hardlink", "reflink", "copy_file_range", "sendfile", "copy2")
+
+# Incremental-run manifest and timing report, stored in the output folder
+MANIFEST_NAME = ".convert_manifest.jsonl"
+REPORT_NAME = ".convert_report.json"
+
+# Timed stages, in pipeline order
+STAGES = ("discovery", "prefetch", "read", "decode", "encode", "write", "copy", "probe", "ffmpeg")
+
+# Bytes hashed for the cheap "probably the same" check before a full hash
+PARTIAL_HASH_BYTES = 64 * 1024
+
+# ioctl request number for FICLONE (copy-on-write clone on btrfs/XFS)
+FICLONE = 0x40049409
+
+
+# One HEIC output: max width/height (None = full size), JPEG/WebP quality
+# (None = Pillow's default) and Pillow format name
+Rendition = namedtuple("Rendition", ["max_dim", "quality", "fmt"])
+DEFAULT_RENDITIONS = (Rendition(None, None, "JPEG"),)
+RENDITION_EXTS = {"JPEG": ".jpg", "WEBP": ".webp", "PNG": ".png"}
+
+
+def parse_rendition(spec):
+    """Parse "MAX_DIM:QUALITY:FORMAT", e.g. "2048:85:jpeg" or "full:default:webp"."""
+    try:
+        max_dim, quality, fmt = spec.split(":")
+        fmt = {"JPG": "JPEG"}.get(fmt.upper(), fmt.upper())
+        if fmt not in RENDITION_EXTS:
+            raise ValueError(f"format must be one of {', '.join(RENDITION_EXTS)}")
+        return Rendition(None if max_dim == "full" else int(max_dim),
+                         None if quality == "default" else int(quality), fmt)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"bad rendition {spec!r}: {e}")
+
+
+def rendition_path(out_file, rendition):
+    """Output path of one rendition: full size keeps the name, others get a _<size> suffix."""
+    if rendition.max_dim is not None:
+        out_file = out_file.with_name(f"{out_file.stem}_{rendition.max_dim}{out_file.suffix}")
+    return out_file.with_suffix(RENDITION_EXTS[rendition.fmt])
+
+
+def output_paths_for(out_file, renditions=DEFAULT_RENDITIONS):
+    """Final output path(s) for a mirrored path (extension changes for converted types)."""
+    ext = out_file.suffix.lower()
+    if ext in HEIF_EXTS:
+        return [rendition_path(out_file, r) for r in renditions]
+    if ext in VIDEO_EXTS:
+        return [out_file.with_suffix(".mp4")]
+    return [out_file]
+
+
+def file_digest(path, limit=None):
+    """BLAKE2b digest of a file's contents (or of its first `limit` bytes)."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fh:
+        if limit is not None:
+            h.update(fh.read(limit))
+        else:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def cpu_seconds():
+    """CPU time used by this process plus its finished children."""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+class StageTimer:
+    """Collects (stage, wall-clock start, seconds) spans for one file."""
+
+    def __init__(self):
+        self.spans = []
+
+    @contextlib.contextmanager
+    def __call__(self, stage):
+        wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((stage, wall, time.perf_counter() - start))
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))]
+
+
+class RunReport:
+    """Aggregates per-file stage spans into per-stage and per-extension statistics."""
+
+    def __init__(self):
+        self.start = time.time()
+        self.stages = {}  # stage → {"seconds": [...], "bytes": int}
+        self.exts = {}  # extension → {"seconds": [...], "bytes": int}
+        self.events = []  # Chrome-trace complete events
+
+    def add(self, rel, size, spans, seconds=None, pid=None):
+        """Record one file: its stage spans and (if it was processed) total seconds."""
+        pid = pid or os.getpid()
+        for stage, wall, dur in spans:
+            totals = self.stages.setdefault(stage, {"seconds": [], "bytes": 0})
+            totals["seconds"].append(dur)
+            totals["bytes"] += size
+            self.events.append({"name": stage, "cat": pathlib.PurePath(rel).suffix.lower(),
+                                "ph": "X", "ts": wall * 1e6, "dur": dur * 1e6, "pid": 1,
+                                "tid": pid, "args": {"file": rel}})
+        if seconds is not None:
+            totals = self.exts.setdefault(pathlib.PurePath(rel).suffix.lower() or "(none)",
+                                          {"seconds": [], "bytes": 0})
+            totals["seconds"].append(seconds)
+            totals["bytes"] += size
+
+    @staticmethod
+    def _summarize(totals):
+        seconds = totals["seconds"]
+        busy = sum(seconds)
+        return {"files": len(seconds), "seconds": round(busy, 3),
+                "files_per_s": round(len(seconds) / busy, 2) if busy else None,
+                "mb_per_s": round(totals["bytes"] / 1e6 / busy, 2) if busy else None,
+                "p50_ms": round(percentile(seconds, 50) * 1e3, 2),
+                "p95_ms": round(percentile(seconds, 95) * 1e3, 2)}
+
+    def to_dict(self):
+        return {"wall_seconds": round(time.time() - self.start, 3),
+                "stages": {stage: self._summarize(self.stages[stage])
+                           for stage in STAGES if stage in self.stages},
+                "extensions": {ext: self._summarize(totals) for ext, totals in sorted(self.exts.items())}}
+
+    def write(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, indent=2)
+
+    def write_trace(self, path):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, fh)
+
+    def print_summary(self):
+        report = self.to_dict()
+        if not report["stages"]:
+            return
+        print(f"\n⏱️ {'stage':<10} {'files':>7} {'busy s':>9} {'files/s':>9} {'MB/s':>9} "
+              f"{'p50 ms':>9} {'p95 ms':>9}")
+        for name, row in list(report["stages"].items()) + list(report["extensions"].items()):
+            print(f"   {name:<10} {row['files']:>7} {row['seconds']:>9.1f} "
+                  f"{row['files_per_s'] or 0:>9.1f} {row['mb_per_s'] or 0:>9.1f} "
+                  f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f}")
+
+
+def _reflink(fsrc, fdst, size):
+    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def _copy_file_range(fsrc, fdst, size):
+    copied = 0
+    while copied < size:
+        n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+        if n == 0:
+            # Short of `size` (FUSE, special files): let the next strategy do it all
+            raise OSError(f"copy_file_range stopped after {copied} of {size} bytes")
+        copied += n
+
+
+def _sendfile(fsrc, fdst, size):
+    copied = 0
+    while copied < size:
+        n = os.sendfile(fdst.fileno(), fsrc.fileno(), copied, size - copied)
+        if n == 0:
+            raise OSError(f"sendfile stopped after {copied} of {size} bytes")
+        copied += n
+
+
+# In-kernel copy strategies, cheapest first (all avoid copying through userspace)
+COPY_STRATEGIES = [("reflink", _reflink), ("sendfile", _sendfile)]
+if hasattr(os, "copy_file_range"):
+    COPY_STRATEGIES.insert(1, ("copy_file_range", _copy_file_range))
+
+
+def temp_path(out_file):
+    """Where an output is written before being renamed into place.
+
+    Renaming replaces the name instead of writing through it, so an output that
+    is hardlinked to another one (--dedup, --link) never changes both.
+    """
+    return out_file.with_name(f".{out_file.stem}.tmp{out_file.suffix}")
+
+
+def copy_file(src, dst, hardlink=False):
+    """Copy `src` to `dst` (keeping metadata) by the cheapest strategy that works.
+
+    Tries a hardlink (only if allowed), then reflink, copy_file_range and
+    sendfile, and falls back to shutil.copy2. Returns the strategy used. The
+    copy is made under a temporary name and renamed over `dst`, so an existing
+    `dst` is replaced, never written through (it may be a hardlink to another
+    output). Raises shutil.SameFileError if `dst` is `src`, like shutil.copy2.
+    """
+    src, dst = pathlib.Path(src), pathlib.Path(dst)
+    if dst.exists() and os.path.samefile(src, dst):
+        if hardlink and not dst.is_symlink():
+            return "hardlink"  # already linked by an earlier run
+        raise shutil.SameFileError(f"{src} and {dst} are the same file")
+
+    tmp = temp_path(dst)
+    try:
+        if hardlink:
+            with contextlib.suppress(FileNotFoundError):
+                tmp.unlink()
+            try:
+                os.link(src, tmp)
+                os.replace(tmp, dst)
+                return "hardlink"
+            except OSError:
+                pass
+
+        size = os.path.getsize(src)
+        for name, strategy in COPY_STRATEGIES:
+            try:
+                with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+                    strategy(fsrc, fdst, size)
+                shutil.copystat(src, tmp)
+                os.replace(tmp, dst)
+                return name
+            except OSError:
+                continue  # unsupported on this filesystem/kernel; the next open truncates tmp
+
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+        return "copy2"
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            tmp.unlink()
+
+
+class DedupIndex:
+    """Finds sources with identical contents: size, then partial hash, then full hash.
+
+    Hashes are only computed for files whose extension and size collide with an
+    earlier file, and each file is hashed at most once per level.
+    """
+
+    def __init__(self):
+        self.by_size = {}
+        self._partial = {}
+        self._full = {}
+
+    def _digest(self, cache, f, limit=None):
+        if f not in cache:
+            cache[f] = file_digest(f, limit)
+        return cache[f]
+
+    def find_or_add(self, f, rel, size):
+        """Return the `rel` of an earlier identical file, or register `f` and return None."""
+        candidates = self.by_size.setdefault((f.suffix.lower(), size), [])
+        for other, other_rel in candidates:
+            if (self._digest(self._partial, other, PARTIAL_HASH_BYTES)
+                    == self._digest(self._partial, f, PARTIAL_HASH_BYTES)
+                    and self._digest(self._full, other) == self._digest(self._full, f)):
+                return other_rel
+        candidates.append((f, rel))
+        return None
+
+
+class Manifest:
+    """Append-only JSON-lines record of source → output, one line per converted file.
+
+    Each record holds the source path (relative to the input folder), its size and
+    mtime, optionally a content hash, and the output path(s) (relative to the output
+    folder; "extra" lists any renditions beyond the first). Records are flushed as
+    files finish, so an interrupted run resumes where it stopped; the file is
+    compacted when the run completes.
+    """
+
+    def __init__(self, output_folder, use_hash=False):
+        self.output_folder = output_folder
+        self.path = output_folder / MANIFEST_NAME
+        self.use_hash = use_hash
+        self.entries = {}
+        self._fh = None
+
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted run
+                    self.entries[record["src"]] = record
+
+    def is_current(self, rel, f, st, out_rels):
+        """True if `rel` was already converted to `out_rels` from a source identical to `f`."""
+        record = self.entries.get(rel)
+        if record is None or record["size"] != st.st_size:
+            return False
+        if self.outputs(record) != out_rels:
+            return False  # converted with a different --rendition set
+        if not all((self.output_folder / out).exists() for out in self.outputs(record)):
+            return False
+        if record["mtime_ns"] == st.st_mtime_ns:
+            return True
+
+        # Same size, new mtime (e.g. re-copied from the phone): trust the hash if we have one
+        if self.use_hash and record.get("hash") and record["hash"] == file_digest(f):
+            self.record(rel, f, st, self.outputs(record), record["hash"])
+            return True
+        return False
+
+    @staticmethod
+    def outputs(record):
+        return [record["out"]] + record.get("extra", [])
+
+    def record(self, rel, f, st, out_rels, digest=None):
+        """Append a record for a successfully converted file."""
+        if digest is None and self.use_hash:
+            digest = file_digest(f)
+        record = {"src": rel, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "out": out_rels[0]}
+        if len(out_rels) > 1:
+            record["extra"] = out_rels[1:]
+        if digest:
+            record["hash"] = digest
+        self.entries[rel] = record
+
+        if self._fh is None:
+            self.output_folder.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(json.dumps(record) + "\n")
+        self._fh.flush()
+
+    def prune(self, seen):
+        """Delete outputs whose sources were not seen in this run. Returns the count."""
+        removed = 0
+        for rel in [rel for rel in self.entries if rel not in seen]:
+            for out in self.outputs(self.entries.pop(rel)):
+                try:
+                    (self.output_folder / out).unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def close(self):
+        """Compact the manifest to one line per source (atomic replace)."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if not self.entries and not self.path.exists():
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for record in self.entries.values():
+                fh.write(json.dumps(record) + "\n")
+        os.replace(tmp, self.path)
+
+
+def init_worker():
+    """Per-process setup for pool workers (the HEIF opener is process-local)."""
     pillow_heif.register_heif_opener()
+
+
+def select_streams(info):
+    """First video stream and first audio stream (or None) from ffprobe JSON."""
+    streams = info["streams"]
+    video = next((s for s in streams if s["codec_type"] == "video"
+                  and not s.get("disposition", {}).get("attached_pic")), None)
+    audio = next((s for s in streams if s["codec_type"] == "audio"), None)
+    return video, audio
+
+
+def probe_streams(f):
+    """First video stream and first audio stream (or None) of a media file, via ffprobe."""
+    return select_streams(ffmpeg.probe(str(f)))
+
+
+def can_remux(video, audio):
+    """True if the probed streams can be stream-copied into MP4 as-is."""
+    return (video is not None and video["codec_name"] in REMUX_VIDEO_CODECS
+            and (audio is None or audio["codec_name"] in REMUX_AUDIO_CODECS))
+
+
+def progress_text(info, duration):
+    """Short status for one running ffmpeg job from its `-progress` key=value block."""
+    # Negative (INT64_MIN) until the first frame is written
+    seconds = max(0, int(info.get("out_time_us") or info.get("out_time_ms") or 0)) / 1e6
+    done = f"{min(100.0, 100 * seconds / duration):.0f}%" if duration else f"{seconds:.0f}s"
+    return f"{done} f={info.get('frame', '?')} {info.get('speed', '?').strip()}"
+
+
+class FfmpegRunner:
+    """Runs ffmpeg/ffprobe as asyncio subprocesses on a loop in a background thread.
+
+    At most `max_jobs` ffmpeg processes run at once. Jobs are coroutines submitted
+    from the main thread and come back as concurrent.futures.Future, so they
+    share the wait()/drain loop with the process pool. Progress parsed from
+    `-progress pipe:1` goes to `on_progress(label, text or None)`. A timed-out or
+    cancelled job (Ctrl-C) has its ffmpeg killed and reaped before it returns.
+    """
+
+    def __init__(self, max_jobs=1, timeout=None, on_progress=None):
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.loop = asyncio.new_event_loop()
+        self.semaphore = asyncio.Semaphore(max(1, max_jobs))
+        self.thread = threading.Thread(target=self.loop.run_forever, name="ffmpeg-runner", daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(cancel=exc_type is not None)
+
+    def submit(self, coro):
+        """Schedule a coroutine on the runner's loop; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def close(self, cancel=False):
+        """Wait for (or, with `cancel`, kill) every job, then stop the loop."""
+        async def drain():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            if cancel:
+                for task in tasks:
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(drain(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def probe(self, f):
+        """ffprobe JSON (format + streams) for a file."""
+        proc = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", str(f),
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = await proc.communicate()
+        if proc.returncode:
+            raise RuntimeError(f"ffprobe failed: {err.decode(errors='replace').strip()}")
+        return json.loads(out)
+
+    async def frame_times(self, f):
+        """Sorted presentation times of the first video stream's frames, in seconds from
+        the file's start time. Frames an edit list hides (discard flag) are left out."""
+        proc = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags:format=start_time", "-of", "json", str(f),
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = await proc.communicate()
+        if proc.returncode:
+            raise RuntimeError(f"ffprobe failed: {err.decode(errors='replace').strip()}")
+        info = json.loads(out)
+        start = float(info.get("format", {}).get("start_time") or 0)
+        return sorted(float(packet["pts_time"]) - start for packet in info.get("packets", [])
+                      if "pts_time" in packet and "D" not in packet.get("flags", ""))
+
+    async def run(self, stream, label, duration=None, slot=True):
+        """Run an ffmpeg-python output stream. Returns ffmpeg's CPU-seconds.
+
+        `slot=False` skips the concurrency limit, for sub-jobs of a job that
+        already holds a slot (segmented encoding).
+        """
+        cmd = (stream
+               .global_args("-nostdin", "-nostats", "-benchmark", "-progress", "pipe:1")
+               .overwrite_output()
+               .compile())
+        async with self.semaphore if slot else contextlib.nullcontext():
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            try:
+                stderr = await asyncio.wait_for(self._watch(proc, label, duration), self.timeout)
+            except BaseException as e:
+                # Timeout or cancellation: never leave an orphaned ffmpeg behind
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise RuntimeError(f"ffmpeg timed out after {self.timeout:g}s") from None
+                raise
+            finally:
+                if self.on_progress:
+                    self.on_progress(label, None)
+
+        if proc.returncode:
+            tail = " / ".join(stderr.strip().splitlines()[-3:])
+            raise RuntimeError(f"ffmpeg exited with {proc.returncode}: {tail}")
+
+        # "bench: utime=1.234s stime=0.056s rtime=..." from -benchmark
+        bench = dict(part.split("=", 1) for line in stderr.splitlines() if line.startswith("bench:")
+                     for part in line.split()[1:] if "=" in part)
+        return sum(float(bench.get(key, "0s").rstrip("s")) for key in ("utime", "stime"))
+
+    async def _watch(self, proc, label, duration):
+        stderr = asyncio.ensure_future(proc.stderr.read())
+        info = {}
+        async for line in proc.stdout:
+            key, _, value = line.decode(errors="replace").strip().partition("=")
+            info[key] = value
+            if key == "progress" and self.on_progress:
+                self.on_progress(label, progress_text(info, duration))
+        await proc.wait()
+        return (await stderr).decode(errors="replace")
+
+
+async def transcode_segmented(runner, f, out_file, duration, x264=None, segment_seconds=60,
+                              segment_jobs=4):
+    """Transcode a long video as chunks encoded in parallel, frame for frame like one encode.
+
+    Every chunk encoder decodes the source itself, seeking to a cut between two
+    frames (-ss/-to with accurate seek, from the keyframe before it), so B-frames,
+    open GOPs and edit lists decode exactly as in a single pass. Timestamps are
+    kept (-copyts), so ffmpeg's frame-rate handling duplicates frames across gaps
+    just as a single encode does; cuts are never placed at a gap. The chunks are
+    joined with the concat demuxer without re-encoding, and the audio is encoded
+    once from the source in the final mux, so it stays continuous and in sync.
+    Returns the total ffmpeg CPU-seconds.
+    """
+    x264 = dict(x264 or {})
+    # Split whatever thread budget this lane has between the chunk encoders
+    x264["threads"] = max(1, (x264.get("threads") or os.cpu_count() or 1) // segment_jobs)
+    limit = asyncio.Semaphore(segment_jobs)
+
+    async def encode(chunk, start, end, i, total):
+        cut = {}
+        if start is not None:
+            cut["ss"] = f"{start:.6f}"
+        if end is not None:
+            cut["to"] = f"{end:.6f}"
+        async with limit:
+            return await runner.run(
+                ffmpeg.input(str(f), **cut)["v:0"].output(str(chunk), vcodec="libx264", copyts=None, **x264),
+                f"{f.name} [{i}/{total}]", segment_seconds, slot=False)
+
+    async with runner.semaphore:
+        times = await runner.frame_times(f)
+        # Cut halfway between two frames about every segment_seconds, skipping
+        # ahead while the step to the next frame is a gap (over 1.5 frames)
+        steps = sorted(b - a for a, b in zip(times, times[1:]))
+        step = steps[len(steps) // 2] if steps else 0
+        cuts, k = [], 1
+        while True:
+            target = (len(cuts) + 1) * segment_seconds
+            while k < len(times) and (times[k] < target or times[k] - times[k - 1] > 1.5 * step):
+                k += 1
+            if k >= len(times) - 1:
+                break
+            cuts.append((times[k - 1] + times[k]) / 2)
+            k += 1
+        bounds = list(zip([None] + cuts, cuts + [None]))
+
+        with tempfile.TemporaryDirectory(prefix=".segments-", dir=out_file.parent) as tmp:
+            tmp = pathlib.Path(tmp)
+            chunks = [tmp / f"chunk{i:05d}.mp4" for i in range(len(bounds))]
+            cpu = sum(await asyncio.gather(*(encode(chunk, start, end, i, len(chunks))
+                                             for i, (chunk, (start, end)) in enumerate(zip(chunks, bounds), 1))))
+
+            concat_list = tmp / "chunks.txt"
+            concat_list.write_text("".join(f"file '{chunk.name}'\n" for chunk in chunks))
+            video = ffmpeg.input(str(concat_list), f="concat", safe=0)
+            source = ffmpeg.input(str(f))
+            cpu += await runner.run(
+                ffmpeg.output(video["v:0"], source["a:0?"], str(out_file), vcodec="copy", acodec="aac",
+                              movflags="+faststart"),
+                f"{f.name} join", duration, slot=False)
+    return cpu
+
+
+async def convert_mov(runner, f, out_file, video_mode="auto", x264=None, timer=None,
+                      segment_seconds=None, segment_jobs=4):
+    """MOV → MP4, by stream-copy remux when possible.
+
+    `x264` holds extra encoder options (threads, preset, crf) for the transcode path.
+    With `segment_seconds`, transcodes of videos longer than two segments are
+    split and encoded in parallel (see transcode_segmented).
+    Returns ("remux" or "transcode", ffmpeg CPU-seconds).
+    """
+    timer = timer or StageTimer()
+    with timer("probe"):
+        info = await runner.probe(f)
+    video, audio = select_streams(info)
+    duration = float(info.get("format", {}).get("duration") or 0)
+
+    if video_mode == "remux" or (video_mode == "auto" and can_remux(video, audio)):
+        # Only the main video/audio tracks: Apple's metadata/timecode tracks don't fit in MP4
+        options = {"c": "copy", "map": ["0:v:0", "0:a:0?"], "movflags": "+faststart"}
+        if video is not None and video["codec_name"] == "hevc":
+            options["tag:v"] = "hvc1"  # what QuickTime/iOS expect for HEVC in MP4
+        action = "remux"
+    else:
+        options = {"vcodec": "libx264", "acodec": "aac", **(x264 or {})}
+        action = "transcode"
+
+    # ffmpeg -y truncates its output in place: write a new file and rename it over
+    tmp = temp_path(out_file)
+    try:
+        with timer("ffmpeg"):
+            if action == "transcode" and segment_seconds and duration >= 2 * segment_seconds:
+                cpu = await transcode_segmented(runner, f, tmp, duration, x264,
+                                                segment_seconds, segment_jobs)
+            else:
+                cpu = await runner.run(ffmpeg.input(str(f)).output(str(tmp), **options), f.name, duration)
+        os.replace(tmp, out_file)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            tmp.unlink()
+    return action, cpu
+
+
+def estimate_cost(f, size, video_mode="auto"):
+    """Estimated (CPU-seconds, action) for a file, from headers/ffprobe only."""
+    ext = f.suffix.lower()
+    try:
+        if ext in HEIF_EXTS:
+            with Image.open(f) as img:  # reads the header, not the pixels
+                width, height = img.size
+            return width * height / 1e6 * IMAGE_COST_PER_MPIX, "jpeg"
+
+        if ext in VIDEO_EXTS:
+            video, audio = probe_streams(f)
+            if video_mode == "remux" or (video_mode == "auto" and can_remux(video, audio)):
+                return size / 1e6 * COPY_COST_PER_MB, "remux"
+            num, _, den = video.get("avg_frame_rate", "0/1").partition("/")
+            fps = float(num) / float(den) if float(den or 0) else 30.0
+            frames = float(video.get("duration") or 0) * fps
+            mpix = video["width"] * video["height"] / 1e6
+            return frames * mpix * VIDEO_COST_PER_MPIX, "transcode"
+    except Exception:
+        pass  # unreadable headers: the real run will report the error
+
+    return size / 1e6 * COPY_COST_PER_MB, "copy"
+
+
+def default_video_threads():
+    """x264 threads per encode unless --video-threads says otherwise: half the machine's cores."""
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def cpu_budget(jobs, video_jobs, video_threads, has_video=True):
+    """Image workers left from `jobs` cores once the ffmpeg lane takes its threads.
+
+    The encoder thread count is fixed up front rather than derived from `jobs`,
+    because x264's output depends on it; the HEIC workers get what is left so
+    the total number of busy threads stays near `jobs`.
+    """
+    if not has_video:
+        return jobs
+    return max(1, jobs - video_jobs * video_threads)
+
+
+def convert_heif(f, out_files, renditions=DEFAULT_RENDITIONS, timer=None):
+    """Decode a HEIF once and save every rendition from the in-memory image.
+
+    Renditions are produced largest first, each resampled from the previous
+    (larger) one rather than from the full-resolution image.
+    """
+    timer = timer or StageTimer()
+    with timer("read"):
+        data = f.read_bytes()
+    with timer("decode"):
+        img = Image.open(io.BytesIO(data)).convert("RGB")
+    order = sorted(range(len(renditions)),
+                   key=lambda i: renditions[i].max_dim or float("inf"), reverse=True)
+    for i in order:
+        rendition = renditions[i]
+        with timer("encode"):
+            if rendition.max_dim is not None and max(img.size) > rendition.max_dim:
+                scale = rendition.max_dim / max(img.size)
+                size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+                img = img.resize(size, Image.Resampling.LANCZOS)
+
+            options = {} if rendition.quality is None else {"quality": rendition.quality}
+            buffer = io.BytesIO()
+            img.save(buffer, rendition.fmt, **options)
+        with timer("write"):
+            tmp = temp_path(out_files[i])
+            tmp.write_bytes(buffer.getbuffer())
+            os.replace(tmp, out_files[i])
+
+
+def process_file(f, out_file, options):
+    """Convert or copy a single file.
+
+    `options` holds the run-wide settings: video_mode, hardlink, x264 (extra
+    encoder options) and renditions. MOVs go through process_video instead.
+
+    Returns a dict with the error (or None), the action taken (conversion
+    or copy strategy), the wall and CPU seconds spent, and
+    the timed stage spans plus worker pid for the run report.
+    """
+    timer = StageTimer()
+    start_cpu = cpu_seconds()
+    start = time.perf_counter()
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    ext = f.suffix.lower()
+
+    out_files = output_paths_for(out_file, options["renditions"])
+    action = None
+
+    try:
+        # HEIF → JPG (plus any extra renditions)
+        if ext in HEIF_EXTS:
+            convert_heif(f, out_files, options["renditions"], timer)
+            action = "jpeg"
+
+        # Other files → copy as-is
+        else:
+            with timer("copy"):
+                action = copy_file(f, out_files[0], options["hardlink"])
+
+    except Exception as e:
+        error = str(e)
+    else:
+        error = None
+
+    return {"error": error, "action": action,
+            "seconds": time.perf_counter() - start, "cpu": cpu_seconds() - start_cpu,
+            "spans": timer.spans, "pid": os.getpid()}
+
+
+async def process_video(runner, f, out_file, options):
+    """MOV → MP4 on the ffmpeg runner. Returns the same result dict as process_file."""
+    timer = StageTimer()
+    start = time.perf_counter()
+    out_file = output_paths_for(out_file)[0]
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    action, cpu, error = None, 0.0, None
+
+    try:
+        action, cpu = await convert_mov(runner, f, out_file, options["video_mode"], options["x264"],
+                                        timer, options["segment_seconds"], options["segment_jobs"])
+    except Exception as e:
+        error = str(e)
+    finally:
+        if error or action is None:  # failed or cancelled: don't leave a partial MP4 behind
+            with contextlib.suppress(FileNotFoundError):
+                out_file.unlink()
+
+    return {"error": error, "action": action, "seconds": time.perf_counter() - start,
+            "cpu": cpu, "spans": timer.spans, "pid": os.getpid()}
+
+
+class Prefetcher:
+    """Stages files from a slow source (e.g. an ifuse mount) into a local folder.
+
+    A small pool of reader threads copies files in the order they were submitted,
+    which is the order the mount lists them. Read-ahead is capped by bytes: a
+    reader waits until enough staged copies have been converted and released
+    (a file bigger than the whole budget is staged on its own).
+    """
+
+    def __init__(self, stage_dir, max_bytes, readers=2):
+        pathlib.Path(stage_dir).mkdir(parents=True, exist_ok=True)
+        self.stage_dir = pathlib.Path(tempfile.mkdtemp(prefix="convert-stage-", dir=stage_dir))
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self.closed = False
+        self.cond = threading.Condition()
+        self.pool = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="prefetch")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self.stage_dir, ignore_errors=True)
+
+    def submit(self, f, rel, size):
+        """Start staging `f`; the Future resolves to (staged path, prefetch span)."""
+        return self.pool.submit(self._stage, f, rel, size)
+
+    def _stage(self, f, rel, size):
+        with self.cond:
+            self.cond.wait_for(lambda: self.closed or self.in_use == 0
+                               or self.in_use + size <= self.max_bytes)
+            if self.closed:
+                raise RuntimeError("staging cancelled")
+            self.in_use += size
+
+        staged = self.stage_dir / rel
+        wall, start = time.time(), time.perf_counter()
+        try:
+            staged.parent.mkdir(parents=True, exist_ok=True)
+            copy_file(f, staged)
+        except BaseException:
+            self.release(staged, size)
+            raise
+        return staged, ("prefetch", wall, time.perf_counter() - start)
+
+    def release(self, staged, size):
+        """Delete a staged copy and give its bytes back to the read-ahead budget."""
+        with contextlib.suppress(FileNotFoundError):
+            staged.unlink()
+        with self.cond:
+            self.in_use -= size
+            self.cond.notify_all()
+
+
+def iter_files(root, errors=None):
+    """Yield a DirEntry for every file under `root`, as soon as it is found.
+
+    Walks with os.scandir so the file/dir type comes from the directory listing
+    itself (no extra stat per entry), and entry.stat() results are cached.
+    Symlinked directories are not followed (like rglob), so a link back up the
+    tree cannot loop. Directories that cannot be read are appended to `errors`.
+    """
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file() and entry.name != MANIFEST_NAME:
+                        yield entry
+        except OSError as e:
+            print(f"⚠️ Cannot read directory: {e}")
+            if errors is not None:
+                errors.append(e)
+
+
+def convert_media(input_folder, output_folder, jobs=1, video_jobs=1, use_hash=False, prune=False,
+                  dedup=False, video_mode="auto", hardlink=False, schedule="stream",
+                  x264_profile="default", dry_run=False, renditions=DEFAULT_RENDITIONS,
+                  report_path=None, trace_path=None, ffmpeg_timeout=None, stage_dir=None,
+                  stage_bytes=2 * 1024 ** 3, readers=2, segment_seconds=None, segment_jobs=4,
+                  video_threads=None):
+    init_worker()
+    video_threads = video_threads or default_video_threads()
     input_folder = pathlib.Path(input_folder)
     output_folder = pathlib.Path(output_folder)
+    manifest = Manifest(output_folder, use_hash=use_hash)
+    dedup_index = DedupIndex() if dedup else None
+    report = RunReport()
 
-    all_files = list(input_folder.rglob("*"))  # recursive
-    files = [f for f in all_files if f.is_file()]
+    seen = set()
+    scan_errors = []
+    skipped = 0
+    # Dedup bookkeeping: finished primaries (rel → CPU-seconds), failed ones,
+    # duplicates waiting on an in-flight primary, and the running savings
+    done_cpu = {}
+    failed = set()
+    waiting = {}
+    saved = {"files": 0, "bytes": 0, "cpu": 0.0}
+    actions = {}
+    copied = {}  # copy strategy → [files, bytes, seconds]
+    in_flight = {}
+    max_in_flight = 4 * (jobs + video_jobs)
 
-    for f in tqdm(files, desc="Processing files"):
-        # Mirror subfolder structure
-        relative_path = f.relative_to(input_folder)
-        out_file = output_folder / relative_path
-        out_file.parent.mkdir(parents=True, exist_ok=True)
+    def out_rels(rel):
+        return [out.as_posix() for out in output_paths_for(pathlib.Path(rel), renditions)]
 
-        ext = f.suffix.lower()
+    def discover():
+        """Yield (path, rel, stat, primary rel if a duplicate) for files needing work."""
+        nonlocal skipped
+        wall, start = time.time(), time.perf_counter()
+        for entry in iter_files(input_folder, scan_errors):
+            f = pathlib.Path(entry.path)
+            rel = f.relative_to(input_folder).as_posix()
+            seen.add(rel)
+            st = entry.stat()
+            report.add(rel, st.st_size, [("discovery", wall, time.perf_counter() - start)])
 
-        try:
-            # HEIF → JPG
-            if ext in (".heic", ".heif"):
-                out_file = out_file.with_suffix(".jpg")
-                img = Image.open(f)
-                img.convert("RGB").save(out_file, "JPEG")
-
-            # MOV → MP4
-            elif ext == ".mov":
-                out_file = out_file.with_suffix(".mp4")
-                (
-                    ffmpeg
-                    .input(str(f))
-                    .output(str(out_file), vcodec="libx264", acodec="aac")
-                    .run(overwrite_output=True, quiet=True)
-                )
-
-            # Other files → copy as-is
+            # Skip files already converted by a previous (possibly interrupted) run
+            if manifest.is_current(rel, f, st, out_rels(rel)):
+                skipped += 1
+                if dedup_index is not None and dedup_index.find_or_add(f, rel, st.st_size) is None:
+                    done_cpu[rel] = 0.0
+                continue
+
+            # Identical to a file seen earlier: reuse its output once it exists
+            primary_rel = dedup_index.find_or_add(f, rel, st.st_size) if dedup_index else None
+            yield f, rel, st, primary_rel
+            wall, start = time.time(), time.perf_counter()
+
+    # Streaming starts work as soon as the first file is found; longest-first
+    # needs the whole list up front to start the most expensive jobs first
+    work = discover()
+    costs = {}
+    if schedule == "longest-first" or dry_run:
+        work = list(work)
+        for f, rel, st, primary_rel in work:
+            costs[rel] = (0.0, "link") if primary_rel else estimate_cost(f, st.st_size, video_mode)
+        if schedule == "longest-first":
+            work.sort(key=lambda item: costs[item[1]][0], reverse=True)
+
+    if schedule == "longest-first":
+        image_workers = cpu_budget(jobs, video_jobs, video_threads,
+                                   any(costs[rel][1] == "transcode" for rel in costs))
+        shared_workers = image_workers
+    else:
+        # Streaming can't know up front whether there are videos, so images get every
+        # core until the first one is dispatched and the ffmpeg lane needs its share
+        image_workers = jobs
+        shared_workers = cpu_budget(jobs, video_jobs, video_threads, True)
+    # x264's output depends on its thread count, so every run uses the same explicit
+    # count whatever --jobs is, and transcodes match a serial run's byte for byte
+    x264 = dict(X264_PROFILES[x264_profile], threads=video_threads)
+    options = {"video_mode": video_mode, "hardlink": hardlink, "x264": x264,
+               "renditions": tuple(renditions), "segment_seconds": segment_seconds,
+               "segment_jobs": segment_jobs}
+
+    if dry_run:
+        workers = image_workers if jobs > 1 else 1
+        videos = [f for f, _, _, primary_rel in work if f.suffix.lower() in VIDEO_EXTS and not primary_rel]
+        if jobs > 1 and videos and shared_workers != image_workers:
+            workers = f"{workers} ({shared_workers} once a video is dispatched)"
+        print(f"📋 Plan ({schedule}): {workers} image worker(s), "
+              f"{video_jobs if jobs > 1 else 1} video lane(s) × {x264['threads']} "
+              f"ffmpeg threads, x264 profile {x264_profile!r}")
+        for i, (f, rel, st, primary_rel) in enumerate(work, 1):
+            cost, action = costs[rel]
+            lane = "video" if f.suffix.lower() in VIDEO_EXTS and not primary_rel else "image"
+            print(f"{i:>6}  {lane:<5}  {action:<9}  {cost:>9.2f}s  {rel}")
+        print(f"⏭️ {skipped} up-to-date files would be skipped")
+        return
+
+    with contextlib.ExitStack() as stack:
+        bar = stack.enter_context(tqdm(total=0, desc="Processing files", unit="file"))
+        stack.callback(manifest.close)
+
+        # Live ffmpeg progress for every running encode, shown on the bar
+        running = {}
+
+        def show_progress(label, text):
+            if text is None:
+                running.pop(label, None)
+            else:
+                running[label] = f"{label} {text}"
+            bar.set_postfix_str(" | ".join(running.values()))
+
+        # Parallel path: images/copies share one pool, ffmpeg gets its own capped
+        # lane so x264 encodes don't starve the HEIC workers (or vice versa)
+        # Staging must outlive the workers reading from it, so it is entered first
+        prefetcher = stack.enter_context(Prefetcher(stage_dir, stage_bytes, readers)) if stage_dir else None
+        runner = stack.enter_context(FfmpegRunner(video_jobs if jobs > 1 else 1, ffmpeg_timeout,
+                                                  show_progress))
+        if jobs > 1 or prefetcher:
+            image_pool = stack.enter_context(
+                ProcessPoolExecutor(max_workers=image_workers, initializer=init_worker))
+
+        # Image jobs allowed to run at once; the pool itself never shrinks
+        image_slots = image_workers
+
+        def dispatch(f, rel, source):
+            """Start converting `source` (the file itself or its staged copy)."""
+            nonlocal image_slots
+            if f.suffix.lower() in VIDEO_EXTS:
+                image_slots = min(image_slots, shared_workers)
+                return runner.submit(process_video(runner, source, output_folder / rel, options))
+            return image_pool.submit(process_file, source, output_folder / rel, options)
+
+        def dispatch_staged(f, rel, st):
+            """Stage `f` locally, then convert the copy; the returned Future is the conversion's."""
+            outer = Future()
+
+            def staged_done(staging):
+                try:
+                    staged, span = staging.result()
+                except Exception as e:
+                    outer.set_result({"error": f"staging failed: {e}", "action": None, "seconds": 0.0,
+                                      "cpu": 0.0, "spans": [], "pid": os.getpid()})
+                    return
+
+                def converted(conversion):
+                    prefetcher.release(staged, st.st_size)
+                    try:
+                        result = conversion.result()
+                    except BaseException as e:
+                        outer.set_exception(e)
+                    else:
+                        result["spans"] = [span] + result["spans"]
+                        outer.set_result(result)
+
+                try:
+                    dispatch(f, rel, staged).add_done_callback(converted)
+                except Exception as e:  # pools already shutting down
+                    prefetcher.release(staged, st.st_size)
+                    outer.set_exception(e)
+
+            prefetcher.submit(f, rel, st.st_size).add_done_callback(staged_done)
+            return outer
+
+        def finish(f, rel, st, result):
+            error, action = result["error"], result["action"]
+            report.add(rel, st.st_size, result["spans"], result["seconds"], result["pid"])
+            if f.suffix.lower() in VIDEO_EXTS and not error:
+                bar.write(f"🎬 {rel}: {action}")
+            actions[action] = actions.get(action, 0) + 1
+            if action in COPY_ACTIONS and not error:
+                totals = copied.setdefault(action, [0, 0, 0.0])
+                totals[0] += 1
+                totals[1] += st.st_size
+                totals[2] += result["seconds"]
+            if error:
+                bar.write(f"⚠️ Error processing {f}: {error}")
+                failed.add(rel)
             else:
-                shutil.copy2(f, out_file)
+                manifest.record(rel, f, st, out_rels(rel))
+                done_cpu[rel] = result["cpu"]
+            bar.update(1)
 
-        except Exception as e:
-            print(f"⚠️ Error processing {f}: {e}")
+            # Duplicates of this file get its output instead of their own conversion
+            for dup in waiting.pop(rel, []):
+                finish_duplicate(*dup, rel, error)
 
+        def finish_duplicate(f, rel, st, primary_rel, primary_error=None):
+            if primary_error:
+                bar.write(f"⚠️ Error processing {f}: duplicate of a file that failed")
+            else:
+                try:
+                    (output_folder / rel).parent.mkdir(parents=True, exist_ok=True)
+                    for src, dst in zip(out_rels(primary_rel), out_rels(rel)):
+                        copy_file(output_folder / src, output_folder / dst, hardlink=True)
+                    manifest.record(rel, f, st, out_rels(rel))
+                    saved["files"] += 1
+                    saved["bytes"] += st.st_size
+                    saved["cpu"] += done_cpu[primary_rel]
+                except OSError as e:
+                    bar.write(f"⚠️ Error processing {f}: {e}")
+            bar.update(1)
+
+        def drain(return_when):
+            done, _ = wait(in_flight, return_when=return_when)
+            for future in done:
+                finish(*in_flight.pop(future), future.result())
+
+        # The bar's total grows with the running count of files found so far
+        for f, rel, st, primary_rel in work:
+            bar.total += 1
+            bar.refresh()
+
+            if primary_rel is not None:
+                if primary_rel in done_cpu or primary_rel in failed:
+                    finish_duplicate(f, rel, st, primary_rel, primary_rel in failed)
+                else:
+                    waiting.setdefault(primary_rel, []).append((f, rel, st))
+                continue
+
+            # Mirror subfolder structure
+            if prefetcher:
+                future = dispatch_staged(f, rel, st)
+            elif jobs > 1 or f.suffix.lower() in VIDEO_EXTS:
+                future = dispatch(f, rel, f)
+            else:
+                finish(f, rel, st, process_file(f, output_folder / rel, options))
+                continue
+
+            in_flight[future] = (f, rel, st)
+            if (jobs <= 1 and not prefetcher) or len(in_flight) >= max_in_flight:
+                drain(FIRST_COMPLETED)
+            # Once the ffmpeg lane has taken its cores, keep at most image_slots images going
+            while image_slots < image_workers and image_slots < sum(
+                    path.suffix.lower() not in VIDEO_EXTS for path, _, _ in in_flight.values()):
+                drain(FIRST_COMPLETED)
+
+        if in_flight:
+            drain(ALL_COMPLETED)
+
+        report.write(pathlib.Path(report_path) if report_path else output_folder / REPORT_NAME)
+        if trace_path:
+            report.write_trace(pathlib.Path(trace_path))
+
+        if prune and scan_errors:
+            # Files under an unreadable directory were not seen, but may still exist
+            bar.write(f"⚠️ Not pruning: {len(scan_errors)} directories could not be read")
+        elif prune:
+            bar.write(f"🗑️ Pruned {manifest.prune(seen)} outputs whose sources are gone")
+
+    if skipped:
+        print(f"⏭️ Skipped {skipped} up-to-date files")
+    if actions.get("remux") or actions.get("transcode"):
+        print(f"🎬 Videos: {actions.get('remux', 0)} remuxed, {actions.get('transcode', 0)} transcoded")
+    for strategy, (count, nbytes, seconds) in copied.items():
+        print(f"📄 Copied {count} files via {strategy}: {nbytes / 1e6:.1f} MB "
+              f"at {nbytes / 1e6 / max(seconds, 1e-9):.1f} MB/s")
+    if saved["files"]:
+        print(f"♻️ Deduplicated {saved['files']} files: saved {saved['bytes'] / 1e6:.1f} MB "
+              f"and {saved['cpu']:.1f} CPU-seconds")
+    report.print_summary()
     print(f"\n✅ Done! All converted files saved under: {output_folder}")
 
 if __name__ == "__main__":
-    import argparse
-
     parser = argparse.ArgumentParser(
         description="Recursively convert HEIF→JPG and MOV→MP4 from an input folder."
     )
     parser.add_argument("input", help="Path to input folder")
     parser.add_argument("output", help="Path to output folder (will be created if missing)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="CPU cores to use, shared between HEIC workers and ffmpeg threads "
+                             "(default: 1, serial)")
+    parser.add_argument("--video-jobs", type=int, default=1,
+                        help="Max concurrent MOV→MP4 ffmpeg jobs when --jobs > 1 (default: 1)")
+    parser.add_argument("--video-threads", type=int, metavar="N",
+                        help="x264 threads per MOV→MP4 transcode, the same for serial and parallel "
+                             "runs so their output is identical (default: half the CPU cores)")
+    parser.add_argument("--hash", action="store_true",
+                        help="Record content hashes so touched-but-unchanged files are still skipped")
+    parser.add_argument("--prune", action="store_true",
+                        help="Delete outputs whose source files no longer exist")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Convert identical sources once and hardlink/reflink the other outputs")
+    parser.add_argument("--video-mode", choices=VIDEO_MODES, default="auto",
+                        help="MOV→MP4: stream-copy remux, full transcode, or auto-pick per file (default: auto)")
+    parser.add_argument("--link", action="store_true",
+                        help="Hardlink pass-through files into the output instead of copying them")
+    parser.add_argument("--schedule", choices=SCHEDULES, default="stream",
+                        help="stream: start work while discovering; longest-first: estimate every "
+                             "file's cost up front and start the most expensive first")
+    parser.add_argument("--x264-profile", choices=sorted(X264_PROFILES), default="default",
+                        help="x264 preset/CRF used when MOVs are transcoded (default: ffmpeg defaults)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the scheduler's plan (order, lane, estimated cost) and exit")
+    parser.add_argument("--rendition", dest="renditions", action="append", type=parse_rendition,
+                        metavar="MAX:QUALITY:FORMAT",
+                        help="HEIC output rendition, repeatable, e.g. full:95:jpeg or 320:80:webp "
+                             "(default: one full-size JPEG)")
+    parser.add_argument("--report", metavar="PATH",
+                        help=f"Where to write the JSON timing report (default: OUTPUT/{REPORT_NAME})")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Also write a Chrome-trace-format timeline of every stage")
+    parser.add_argument("--ffmpeg-timeout", type=float, metavar="SECONDS",
+                        help="Kill any single ffmpeg job that runs longer than this")
+    parser.add_argument("--stage-dir", metavar="DIR",
+                        help="Read from a slow mount through a local staging folder, pipelined "
+                             "with conversion")
+    parser.add_argument("--stage-mb", type=int, default=2048,
+                        help="Max MB of staged-but-not-yet-converted files (default: 2048)")
+    parser.add_argument("--readers", type=int, default=2,
+                        help="Reader threads copying from the source into staging (default: 2)")
+    parser.add_argument("--segment-seconds", type=float, metavar="SECONDS",
+                        help="Transcode videos longer than two segments as chunks of about this "
+                             "length, encoded in parallel")
+    parser.add_argument("--segment-jobs", type=int, default=4,
+                        help="Parallel chunk encoders per segmented video (default: 4)")
     args = parser.parse_args()
 
-    convert_media(args.input, args.output)
+    convert_media(args.input, args.output, jobs=args.jobs, video_jobs=args.video_jobs,
+                  use_hash=args.hash, prune=args.prune, dedup=args.dedup,
+                  video_mode=args.video_mode, hardlink=args.link, schedule=args.schedule,
+                  x264_profile=args.x264_profile, dry_run=args.dry_run,
+                  renditions=args.renditions or DEFAULT_RENDITIONS,
+                  report_path=args.report, trace_path=args.trace,
+                  ffmpeg_timeout=args.ffmpeg_timeout, stage_dir=args.stage_dir,
+                  stage_bytes=args.stage_mb * 1024 ** 2, readers=args.readers,
+                  segment_seconds=args.segment_seconds, segment_jobs=args.segment_jobs,
+                  video_threads=args.video_threads)
@@ -4,6 +4,7 @@ from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
 from PIL import Image
 import io
+import bg_remove_core
 from PyQt5.QtGui import QFont
 
 
@@ -289,23 +290,8 @@ class BackgroundRemoverApp(QWidget):
             QMessageBox.warning(self, "Invalid input", "Please enter valid RGB values.")
             return
 
-        # Open the image and convert it to RGBA (to support transparency)
-        image = Image.open(self.input_image_path).convert("RGBA")
-        pixels = image.load()
-
-        # Unpack the min and max RGB values
-        min_r, min_g, min_b = min_rgb
-        max_r, max_g, max_b = max_rgb
-
-        # Get image dimensions
-        width, height = image.size
-
-        # Loop through each pixel and remove background if it matches the RGB range
-        for y in range(height):
-            for x in range(width):
-                r, g, b, a = pixels[x, y]
-                if min_r <= r <= max_r and min_g <= g <= max_g and min_b <= b <= max_b:
-                    pixels[x, y] = (255, 255, 255, 0)  # Make pixel transparent
+        # Open the image and make every pixel in the RGB range transparent
+        image = bg_remove_core.remove_background(Image.open(self.input_image_path), min_rgb, max_rgb)
 
         # Store the resulting image to update the preview
         self.output_image = image
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+bg_remove_cmd.py - Remove backgrounds from many images without the GUI
+
+Takes files, wildcards or directories, removes every pixel in the colour range
+(a preset or explicit --min/--max RGB) with bg_remove_core and writes a PNG per
+input to the output directory. Inputs are discovered lazily and fanned out over
+a process pool with a bounded number of jobs in flight, so a directory of tens
+of thousands of images starts converting straight away. Never imports PyQt5.
+
+Usage:
+    bg_remove_cmd.py INPUT [INPUT ...] -o OUTPUT_DIR [--preset White|Black] [-j N]
+    bg_remove_cmd.py INPUT [INPUT ...] -o OUTPUT_DIR --min R G B --max R G B
+
+Library use:
+    from bg_remove_cmd import iter_inputs, remove_batch
+    for ok, message in remove_batch(iter_inputs(["photos/"]), "out", *PRESETS["White"], jobs=8):
+        ...
+"""
+
+import argparse
+import os
+import sys
+from glob import iglob
+
+from PIL import Image
+
+from bg_remove_core import PRESETS, remove_background
+
+# Inputs picked up from directories; explicit files and wildcards are taken as given
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff", ".gif"}
+
+
+def scan_dir(root, recursive=True):
+    """Yield (path, path relative to root) of the images under root, as they are found."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            print(f"⚠️  Cannot read {directory}: {e}")
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                    yield entry.path, os.path.relpath(entry.path, root)
+
+
+def iter_inputs(patterns, recursive=True):
+    """Yield (input path, relative output name) for every file, wildcard match or directory image.
+
+    Files from a directory keep their sub-path under that directory; files and
+    wildcard matches just keep their name. Different inputs can therefore map to
+    the same output (a/x.png and b/x.png, or x.png and x.jpg); remove_batch
+    fails the later ones instead of overwriting.
+    """
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            yield from scan_dir(pattern, recursive)
+            continue
+        matched = False
+        for path in iglob(pattern, recursive=True):
+            matched = True
+            if os.path.isdir(path):
+                yield from scan_dir(path, recursive)
+            else:
+                yield path, os.path.basename(path)
+        if not matched:
+            print(f"⚠️  No files match {pattern}")
+
+
+def output_path(output_dir, relative):
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + ".png")
+
+
+def remove_file(input_file, output_file, min_rgb, max_rgb, compress_level=6):
+    """Remove the background of one image and save it as PNG. Returns (ok, message)."""
+    try:
+        with Image.open(input_file) as im:
+            result = remove_background(im, min_rgb, max_rgb)
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        # Written under a temporary name, so a reader never sees half a PNG
+        tmp_file = f"{output_file}.tmp"
+        result.save(tmp_file, "PNG", compress_level=compress_level)
+        os.replace(tmp_file, output_file)
+        return True, f"✅ {input_file} -> {output_file}"
+    except Exception as e:
+        return False, f"❌ Failed to process {input_file}: {e}"
+
+
+def unique_outputs(inputs, output_dir):
+    """Yield (input path, output path, error) for each pair.
+
+    `error` is a message, instead of None, when an earlier input already has that
+    output path (e.g. a/x.png and b/x.png), so the file is never overwritten.
+    """
+    claimed = {}  # normalized output path -> the input that has it
+    for input_file, relative in inputs:
+        output_file = output_path(output_dir, relative)
+        key = os.path.normcase(os.path.normpath(output_file))
+        if key in claimed:
+            yield input_file, output_file, (f"❌ Skipped {input_file}: {output_file} is already the output of "
+                                            f"{claimed[key]}")
+        else:
+            claimed[key] = input_file
+            yield input_file, output_file, None
+
+
+def remove_batch(inputs, output_dir, min_rgb, max_rgb, jobs=1, compress_level=6):
+    """Process (input path, relative name) pairs, yielding (ok, message) for each as it finishes.
+
+    With jobs > 1 the files are fanned out over a process pool, keeping at most
+    a few jobs per worker in flight, so `inputs` is only read as fast as the
+    pool drains it. An input whose output path was already taken by an earlier
+    one fails without being processed.
+    """
+    outputs = unique_outputs(inputs, output_dir)
+    if jobs <= 1:
+        for input_file, output_file, error in outputs:
+            if error:
+                yield False, error
+            else:
+                yield remove_file(input_file, output_file, min_rgb, max_rgb, compress_level)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    max_in_flight = 4 * jobs
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = set()
+        for input_file, output_file, error in outputs:
+            if error:
+                yield False, error
+                continue
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(pool.submit(remove_file, input_file, output_file, min_rgb, max_rgb, compress_level))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="bg_remove_cmd.py",
+                                     description="Remove image backgrounds by colour range, without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="Input files, wildcards (quote them) or directories")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory to write the PNGs to")
+    parser.add_argument("--preset", choices=list(PRESETS), default="White",
+                        help="Colour range to remove (default: White)")
+    parser.add_argument("--min", type=int, nargs=3, metavar=("R", "G", "B"),
+                        help="Lower RGB bound; overrides the preset (needs --max)")
+    parser.add_argument("--max", type=int, nargs=3, metavar=("R", "G", "B"),
+                        help="Upper RGB bound; overrides the preset (needs --min)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Process in parallel across N processes (default: one per CPU)")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not descend into subdirectories")
+    parser.add_argument("--compress-level", type=int, choices=range(10), default=6, metavar="0-9",
+                        help="PNG compression level; lower is faster and bigger (default: 6)")
+    args = parser.parse_args()
+
+    if (args.min is None) != (args.max is None):
+        parser.error("--min and --max must be given together")
+    if args.min is not None:
+        min_rgb, max_rgb = tuple(args.min), tuple(args.max)
+    else:
+        min_rgb, max_rgb = PRESETS[args.preset]
+
+    inputs = iter_inputs(args.inputs, recursive=not args.no_recursive)
+    done = 0
+    failures = []
+    for ok, message in remove_batch(inputs, args.output_dir, min_rgb, max_rgb, args.jobs,
+                                    args.compress_level):
+        print(message)
+        done += 1
+        if not ok:
+            failures.append(message)
+
+    if not done:
+        print("❌ No input images found.")
+        sys.exit(1)
+    if failures:
+        print(f"\n❌ {len(failures)} of {done} image(s) failed:")
+        for message in failures:
+            print(f"   {message}")
+        sys.exit(1)
+    print(f"\n✅ Removed the background of {done} image(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+bg_remove_core.py - The colour-key background removal, without any GUI
+
+Used by the Qt app (background_Remover_V1_0.py); needs only Pillow and NumPy.
+"""
+
+import numpy as np
+from PIL import Image
+
+# (min RGB, max RGB) of the GUI's presets; the bounds are inclusive
+PRESETS = {
+    "White": ((150, 150, 150), (256, 256, 256)),
+    "Black": ((0, 0, 0), (50, 50, 50)),
+}
+
+# What a removed pixel becomes
+CLEAR = (255, 255, 255, 0)
+
+
+def remove_background(image, min_rgb, max_rgb):
+    """Make every pixel whose R, G and B all lie within min_rgb..max_rgb transparent.
+
+    Returns a new RGBA image; matching pixels become (255, 255, 255, 0) and the
+    alpha of the source pixel is ignored, exactly like the original per-pixel
+    loop. The mask is built with vectorized comparisons on a NumPy view of the
+    RGBA buffer and the cleared pixels are written into a copy of it in place.
+    """
+    rgba = np.asarray(image.convert("RGBA"))  # height x width x 4, uint8, read-only view
+    height, width = rgba.shape[:2]
+
+    mask = np.ones((height, width), dtype=bool)
+    scratch = np.empty((height, width), dtype=np.uint8)
+    in_range = np.empty((height, width), dtype=bool)
+    for channel, (low, high) in enumerate(zip(min_rgb, max_rgb)):
+        # Clamped into uint8 range (e.g. the White preset's 256); same result
+        low, high = max(int(low), 0), min(int(high), 255)
+        if low > high:
+            mask[:] = False  # this channel never matches, so nothing does
+            break
+        # low <= v <= high  <=>  (v - low) mod 256 <= high - low: one subtraction, one comparison
+        np.subtract(rgba[..., channel], np.uint8(low), out=scratch)
+        np.less_equal(scratch, np.uint8(high - low), out=in_range)
+        mask &= in_range
+
+    pixels = rgba.copy()
+    # One 32-bit store per pixel instead of four byte stores
+    np.copyto(pixels.view(np.uint32), np.array(CLEAR, dtype=np.uint8).view(np.uint32),
+              where=mask[..., np.newaxis])
+    return Image.fromarray(pixels)
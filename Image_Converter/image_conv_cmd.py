@@ -3,24 +3,90 @@
 imgconvert.py - Universal image converter with auto-detected formats and batch support
 
 Usage:
-    imgconvert.py input_file target_format
-    imgconvert.py file1 file2 ... target_format
+    imgconvert.py input_file target_format[,target_format...]
+    imgconvert.py file1 file2 ... target_format [-j N] [--unordered] [--threads N]
+                  [--cache-dir DIR [--cache-mb N]] [--max-size N] [--mem-budget MB]
+                  [--profile fast|balanced|small] [--target-size SIZE | --auto | --auto-bpp BPP]
     imgconvert.py formats   # show supported formats
+    imgconvert.py serve [--socket PATH] [-j N]   # long-running converter
+    imgconvert.py client --socket PATH file1 file2 ... target_format
+    imgconvert.py watch DIR target_format [-j N] [--debounce-ms 50] [--existing]
+
+The extension -> format table is cached per Pillow version in
+$XDG_CACHE_HOME/imgconvert (default ~/.cache/imgconvert), so a normal run only
+imports the Pillow plugins for its input and target formats.
+
+`serve` keeps Pillow warm in a worker pool and reads newline-delimited JSON
+jobs from a Unix socket (or stdin when --socket is not given), one per line:
+
+    {"id": 1, "input": "/abs/path/logo.png", "targets": "png,ico", "profile": "small"}
+
+and streams one JSON result per job back as each finishes:
+
+    {"id": 1, "input": "/abs/path/logo.png", "ok": true, "message": "..."}
+
+`client` takes the same arguments as a normal run and sends them to a server.
+
+`watch` converts images as they land in a spool directory, using inotify
+(close-after-write and rename-into events) on Linux and a directory poll
+elsewhere. Files with a target extension are ignored, so outputs written next
+to the inputs never trigger another conversion.
 
 Examples:
     imgconvert.py logo.png ico
     imgconvert.py *.png jpg
+    imgconvert.py "photos/*.png" webp -j 8
+    imgconvert.py logo.png png,webp,jpeg,ico   # decodes logo.png once
     imgconvert.py formats
 """
 
 import sys
 import os
+import argparse
+import importlib
+import io
+import json
+import hashlib
+import shutil
+import threading
+import time
+from collections import deque
 from glob import glob
-from PIL import Image
+import PIL  # just the version here; PIL.Image and its plugins are imported lazily
 
 # Common multi-size set for ICO files
 ICO_SIZES = [(16, 16), (32, 32), (48, 48), (64, 64), (128, 128), (256, 256)]
 
+# Large sources are cheaply shrunk (JPEG draft / Image.reduce) to no less than
+# this before the ICO sizes are resampled from them
+ICO_PREVIEW = 2 * max(w for w, h in ICO_SIZES)
+
+# Encoder options per profile and Pillow format; formats not listed keep Pillow's defaults
+PROFILES = {
+    "fast": {
+        "PNG": {"compress_level": 1},
+        "JPEG": {"quality": 85},
+        "WEBP": {"quality": 80, "method": 0},
+    },
+    "balanced": {
+        "PNG": {"compress_level": 6},
+        "JPEG": {"quality": 85, "optimize": True},
+        "WEBP": {"quality": 80, "method": 4},
+        "TIFF": {"compression": "tiff_lzw"},
+    },
+    "small": {
+        "PNG": {"compress_level": 9, "optimize": True},
+        "JPEG": {"quality": 75, "optimize": True, "progressive": True},
+        "WEBP": {"quality": 75, "method": 6},
+        "TIFF": {"compression": "tiff_adobe_deflate"},
+        "GIF": {"optimize": True},
+    },
+}
+
+# Formats with a "quality" knob that --target-size/--auto can search, and the range searched
+QUALITY_FORMATS = {"JPEG", "WEBP", "AVIF", "HEIF"}
+QUALITY_RANGE = (10, 95)
+
 # Aliases for convenience
 ALIASES = {
     "jpg": "jpeg",
@@ -28,87 +94,1143 @@ ALIASES = {
 }
 
 
+# Loaded format table (see load_format_table)
+_format_table = None
+
+
+def format_cache_path():
+    """On-disk cache of the format table, keyed by the Pillow version."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "imgconvert", f"formats-{PIL.__version__}.json")
+
+
+def build_format_table():
+    """Ask Pillow for every extension -> format and format -> plugin module (slow: loads all plugins)."""
+    from PIL import Image
+
+    Image.init()
+    plugins = {}
+    for fmt, factory in Image.OPEN.items():
+        plugins[fmt] = factory[0].__module__
+    for fmt, save in Image.SAVE.items():
+        plugins.setdefault(fmt, save.__module__)
+    return {"extensions": Image.registered_extensions(), "plugins": plugins}
+
+
+def load_format_table():
+    """The format table, from the on-disk cache when possible."""
+    global _format_table
+    if _format_table is None:
+        path = format_cache_path()
+        try:
+            with open(path, encoding="utf-8") as fh:
+                _format_table = json.load(fh)
+        except (OSError, ValueError):
+            _format_table = build_format_table()
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + ".tmp", "w", encoding="utf-8") as fh:
+                    json.dump(_format_table, fh)
+                os.replace(path + ".tmp", path)
+            except OSError:
+                pass  # read-only home etc.: just rebuild next time
+    return _format_table
+
+
+def load_plugins(*formats):
+    """Import only the Pillow plugins for these formats instead of all of them."""
+    plugins = load_format_table()["plugins"]
+    for fmt in formats:
+        if fmt in plugins:
+            importlib.import_module(plugins[fmt])
+
+
 def get_valid_formats():
     """Get a mapping of extensions -> format names supported by Pillow."""
     valid_formats = {}
-    for ext, fmt in Image.registered_extensions().items():
+    for ext, fmt in load_format_table()["extensions"].items():
         valid_formats[ext.lstrip(".").lower()] = fmt
     return valid_formats
 
 
 def show_formats():
-    exts = Image.registered_extensions()
+    exts = load_format_table()["extensions"]
     print("✅ Supported formats on this system:\n")
     for ext in sorted(exts.keys()):
         print(f"{ext}  ->  {exts[ext]}")
 
 
-def convert_file(input_file, target_ext, valid_formats):
-    """Convert a single file to the target format."""
+def ico_frames(im):
+    """The ICO sizes as a resize cascade, largest first: 256 -> 128 -> ... -> 16.
+
+    The source is first box-reduced to about ICO_PREVIEW pixels and every level
+    is resampled from the one above it, instead of the encoder resampling all
+    six sizes from the full-resolution image. Non-square sources only get the
+    reduce; the encoder then fits each size from that smaller copy.
+    """
+    from PIL import Image
+
+    factor = min(im.size) // ICO_PREVIEW
+    if factor > 1:
+        im = im.reduce(factor)
+    if im.width != im.height:
+        return [im]
+
+    frames = []
+    for size in sorted(ICO_SIZES, reverse=True):
+        if size[0] > im.width:
+            continue
+        if im.size != size:
+            im = im.resize(size, Image.LANCZOS)
+        frames.append(im)
+    return frames or [im]
+
+
+def encode_to_size(im, fmt, options, target_size):
+    """Highest quality whose encoding fits in target_size bytes. Returns (data, quality, attempts).
+
+    Bisects QUALITY_RANGE, encoding into memory; tries the top of the range
+    first, so an image that already fits costs a single encode. If even the
+    lowest quality is too big, that smallest encoding is returned.
+    """
+    def attempt(quality):
+        buf = io.BytesIO()
+        im.save(buf, fmt, **{**options, "quality": quality})
+        return buf.getvalue()
+
+    lo, hi = QUALITY_RANGE
+    data = attempt(hi)
+    if len(data) <= target_size:
+        return data, hi, 1
+
+    best, attempts = None, 1
+    hi -= 1
+    while lo <= hi:  # everything above hi is known to be too big
+        mid = (lo + hi) // 2
+        data = attempt(mid)
+        attempts += 1
+        if len(data) <= target_size:
+            best = data, mid
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    if best is None:
+        best = (data, mid) if mid == QUALITY_RANGE[0] else (attempt(QUALITY_RANGE[0]), QUALITY_RANGE[0])
+    return best[0], best[1], attempts
+
+
+def save_frames(source, output_file, fmt, encoding=None):
+    """Write every frame of a multi-frame source (animated GIF/WebP/PNG, multi-page TIFF).
+
+    The writer is handed the opened source itself and seeks it one frame at a
+    time, converting each frame's mode as it goes, so frames are never all
+    decoded into memory at once (WebP, TIFF and PDF encode as they go; the GIF
+    and APNG writers keep their own frame list to compute deltas). Written to a
+    temporary name first, as the source may be the file being replaced.
+    Returns a note for the message.
+    """
+    from PIL import ImageSequence
+
+    options = dict(PROFILES.get((encoding or {}).get("profile"), {}).get(fmt, {}))
+    if fmt == "WEBP":
+        # The WebP writer uses one duration for every frame unless given a list;
+        # collecting them decodes each frame once more, but never holds them
+        durations = [frame.info.get("duration", 0) for frame in ImageSequence.Iterator(source)]
+        options["duration"] = durations if len(set(durations)) > 1 else durations[0]
+        if "loop" in source.info:
+            options["loop"] = source.info["loop"]
+        source.seek(0)
+
+    tmp = f"{output_file}.tmp"
+    try:
+        source.save(tmp, fmt, save_all=True, **options)
+        os.replace(tmp, output_file)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    frames = source.n_frames
+    source.seek(0)
+    return f"{frames} frames"
+
+
+def save_target(im, output_file, target_ext, valid_formats, encoding=None):
+    """Encode one already-decoded (and mode-converted) image to one target format.
+
+    `encoding` may name a "profile" (see PROFILES) and a size goal: "target_size"
+    in bytes, or "auto_bpp" bits per pixel. Returns a note for the message, or None.
+    """
+    fmt = valid_formats[target_ext]
+    encoding = encoding or {}
+    # Written to a temporary name and renamed over output_file: the old file may
+    # be hardlinked to an OutputCache entry, which must not change with it
+    tmp = f"{output_file}.tmp"
+    try:
+        note = encode_target(im, tmp, target_ext, fmt, encoding)
+        os.replace(tmp, output_file)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return note
+
+
+def encode_target(im, path, target_ext, fmt, encoding):
+    """save_target's encode, to `path`."""
+    # ICO requires special handling
+    if target_ext == "ico":
+        frames = ico_frames(im)
+        frames[0].save(path, fmt, sizes=ICO_SIZES, append_images=frames[1:])
+        return None
+
+    options = PROFILES.get(encoding.get("profile"), {}).get(fmt, {})
+    target_size = encoding.get("target_size")
+    if encoding.get("auto_bpp"):
+        target_size = int(im.width * im.height * encoding["auto_bpp"] / 8)
+    if not target_size or fmt not in QUALITY_FORMATS:
+        im.save(path, fmt, **options)
+        return None
+
+    data, quality, attempts = encode_to_size(im, fmt, options, target_size)
+    with open(path, "wb") as fh:
+        fh.write(data)
+    over = " - over target" if len(data) > target_size else ""
+    return f"quality {quality}, {len(data) / 1024:.0f} KB in {attempts} encodes{over}"
+
+
+class OutputCache:
+    """Content-addressed store of converted outputs, evicted least recently used first.
+
+    Entries are keyed by a hash of the input bytes, the target format and the
+    encoder parameters, so a hit can be written out without decoding anything.
+    The cache size is tracked in two small files in the root (the total at the
+    last full scan, plus a line per entry stored since), so evict() only walks
+    the cache when that total is over budget.
+    """
+
+    VERSION = 2  # bump when the conversion itself changes
+    USAGE = "usage"  # bytes in the cache at the last full scan
+    JOURNAL = "stored"  # size of every entry stored since, one per line
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def digest(path):
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def key(self, digest, target_ext, fmt, **settings):
+        params = [self.VERSION, PIL.__version__, digest, target_ext, fmt]
+        if target_ext == "ico":
+            params += [ICO_SIZES, ICO_PREVIEW]
+        settings = {name: value for name, value in settings.items() if value}
+        if settings:
+            params += [settings]
+        return hashlib.blake2b(json.dumps(params).encode("utf-8"), digest_size=20).hexdigest()
+
+    def path(self, key, target_ext):
+        return os.path.join(self.root, key[:2], f"{key}.{target_ext}")
+
+    def fetch(self, key, target_ext, output_file):
+        """Write the cached output for key to output_file (hardlink, else copy). True on a hit."""
+        entry = self.path(key, target_ext)
+        if not os.path.isfile(entry):
+            return False
+        try:
+            if not (os.path.exists(output_file) and os.path.samefile(entry, output_file)):
+                tmp = output_file + ".cache-tmp"
+                try:
+                    os.link(entry, tmp)
+                except OSError:
+                    shutil.copyfile(entry, tmp)
+                os.replace(tmp, output_file)
+            os.utime(entry)  # mark as recently used
+        except OSError:
+            return False
+        return True
+
+    def store(self, key, target_ext, output_file):
+        entry = self.path(key, target_ext)
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            shutil.copyfile(output_file, entry + ".tmp")
+            os.replace(entry + ".tmp", entry)
+            # O_APPEND: workers storing at the same time don't overwrite each other's lines
+            fd = os.open(os.path.join(self.root, self.JOURNAL), os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+            try:
+                os.write(fd, f"{os.path.getsize(entry)}\n".encode())
+            finally:
+                os.close(fd)
+        except OSError:
+            pass  # the cache is best effort
+
+    def usage(self):
+        """Approximate bytes in the cache (overcounts replaced entries), or None if never scanned."""
+        try:
+            with open(os.path.join(self.root, self.USAGE), encoding="utf-8") as fh:
+                total = int(fh.read())
+        except (OSError, ValueError):
+            return None
+        try:
+            with open(os.path.join(self.root, self.JOURNAL), encoding="utf-8") as fh:
+                total += sum(int(line) for line in fh if line.strip())
+        except FileNotFoundError:
+            pass  # nothing stored since the scan
+        except (OSError, ValueError):
+            return None
+        return total
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        usage = self.usage()
+        if (usage is not None and usage <= self.max_bytes) or not os.path.isdir(self.root):
+            return
+
+        entries = []
+        total = 0
+        for dirpath, _, files in os.walk(self.root):
+            if dirpath == self.root:
+                continue  # only the usage files live at the top
+            for name in files:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+        # The scan counted everything stored so far: restart the journal from it
+        try:
+            try:
+                os.unlink(os.path.join(self.root, self.JOURNAL))
+            except FileNotFoundError:
+                pass
+            tmp = os.path.join(self.root, self.USAGE + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(str(total))
+            os.replace(tmp, os.path.join(self.root, self.USAGE))
+        except OSError:
+            pass
+
+
+def convert_file(input_file, target_exts, valid_formats, threads=1, cache=None, max_size=None,
+                 encoding=None):
+    """Convert a single file to one or more target formats. Returns (ok, message, cache_hits).
+
+    The source is decoded once; the mode-converted copies some formats need
+    (RGB for JPEG, RGBA for ICO) are made once and shared. With threads > 1 the
+    targets are encoded in parallel threads (Pillow releases the GIL while
+    encoding), each on its own copy since save() stores state on the image.
+    Targets found in the OutputCache `cache` are written from it without decoding.
+    With max_size, the image is shrunk to fit max_size x max_size as it is
+    decoded (JPEG draft, then Image.reduce) so huge sources never sit in memory
+    at full resolution longer than needed. `encoding` picks encoder options,
+    see save_target. Multi-frame sources are streamed frame by frame into
+    targets that support several frames (see save_frames); --max-size and the
+    size goals only apply to single-frame output.
+    """
+    if isinstance(target_exts, str):
+        target_exts = [target_exts]
     if not os.path.isfile(input_file):
-        print(f"❌ File not found: {input_file}")
-        return
+        return False, f"❌ File not found: {input_file}", 0
 
     # Lowercase output extension
-    base, _ = os.path.splitext(input_file)
-    output_file = f"{base}.{target_ext}"
+    base, input_ext = os.path.splitext(input_file)
+
+    results = {}  # target -> (ok, message)
+    keys = {}  # target -> cache key
+    if cache is not None:
+        try:
+            digest = cache.digest(input_file)
+        except OSError as e:
+            return False, f"❌ Conversion failed for {input_file}: {e}", 0
+        for ext in target_exts:
+            keys[ext] = cache.key(digest, ext, valid_formats[ext], max_size=max_size, **(encoding or {}))
+            output_file = f"{base}.{ext}"
+            if cache.fetch(keys[ext], ext, output_file):
+                results[ext] = True, f"✅ Saved: {output_file} (from cache)"
+    hits = len(results)
+    misses = [ext for ext in target_exts if ext not in results]
+
+    def summary():
+        ordered = [results[ext] for ext in target_exts]
+        return all(ok for ok, _ in ordered), "\n".join(message for _, message in ordered), hits
+
+    if not misses:
+        return summary()
 
     try:
-        im = Image.open(input_file)
+        from PIL import Image
 
+        # Image.open still falls back to every plugin if the extension lies
+        load_plugins(valid_formats.get(input_ext.lstrip(".").lower()),
+                     *(valid_formats[ext] for ext in misses))
+        im = source = Image.open(input_file)
+        # Multi-frame sources keep every frame in targets that can hold them
+        animated = []
+        if getattr(source, "is_animated", False) or getattr(source, "n_frames", 1) > 1:
+            animated = [ext for ext in misses if valid_formats[ext] in Image.SAVE_ALL]
+        draft = None
+        if misses == ["ico"]:
+            # Only small sizes are needed: let JPEG decode at 1/2..1/8 scale
+            draft = (ICO_PREVIEW, ICO_PREVIEW)
+        if max_size and max(im.size) > max_size:
+            scale = max_size / max(im.size)
+            fit = (max(1, round(im.width * scale)), max(1, round(im.height * scale)))
+            draft = fit if draft is None else (max(draft[0], fit[0]), max(draft[1], fit[1]))
+        if draft:
+            im.draft(None, draft)
+        im.load()
+        if max_size and max(im.size) > max_size:
+            # Palette and bilevel pixels can't be filtered (reduce() rejects them)
+            if im.mode in ("P", "PA"):
+                im = im.convert("RGBA" if im.mode == "PA" or "transparency" in im.info else "RGB")
+            elif im.mode == "1":
+                im = im.convert("L")
+            factor = max(im.size) // max_size
+            if factor > 1 and not im.mode.startswith("I;16"):  # nor does it take 16-bit; resize does
+                im = im.reduce(factor)  # cheap box filter first...
+            scale = max_size / max(im.size)
+            # ...then the exact fit (a new image: the seekable source stays intact)
+            im = im.resize((max(1, round(im.width * scale)), max(1, round(im.height * scale))), Image.LANCZOS)
+    except Exception as e:
+        return False, f"❌ Conversion failed for {input_file}: {e}", hits
+
+    converted = {}  # mode -> shared converted copy
+
+    def image_for(target_ext):
+        mode = None
         # JPEG requires RGB
         if target_ext == "jpeg" and im.mode in ("RGBA", "P"):
-            im = im.convert("RGB")
+            mode = "RGB"
+        # ICO needs RGB or RGBA
+        elif target_ext == "ico" and im.mode not in ("RGB", "RGBA"):
+            mode = "RGBA"
+        if mode is None:
+            return im
+        if mode not in converted:
+            converted[mode] = im.convert(mode)
+        return converted[mode]
 
-        # ICO requires special handling
-        if target_ext == "ico":
-            if im.mode not in ("RGB", "RGBA"):
-                im = im.convert("RGBA")
-            im.save(output_file, valid_formats[target_ext], sizes=ICO_SIZES)
+    def encode(target_ext, image):
+        output_file = f"{base}.{target_ext}"
+        try:
+            note = save_target(image, output_file, target_ext, valid_formats, encoding)
+            if target_ext in keys:
+                cache.store(keys[target_ext], target_ext, output_file)
+            return True, f"✅ Saved: {output_file}" + (f" ({note})" if note else "")
+        except Exception as e:
+            return False, f"❌ Conversion failed for {input_file} -> {target_ext}: {e}"
+
+    def encode_frames(target_ext):
+        output_file = f"{base}.{target_ext}"
+        try:
+            note = save_frames(source, output_file, valid_formats[target_ext], encoding)
+            if target_ext in keys:
+                cache.store(keys[target_ext], target_ext, output_file)
+            return True, f"✅ Saved: {output_file} ({note})"
+        except Exception as e:
+            return False, f"❌ Conversion failed for {input_file} -> {target_ext}: {e}"
+
+    stills = [ext for ext in misses if ext not in animated]
+    jobs = [(ext, image_for(ext)) for ext in stills]
+    if threads > 1 and len(jobs) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            encoded = list(pool.map(lambda job: encode(job[0], job[1].copy()), jobs))
+    else:
+        encoded = [encode(ext, image) for ext, image in jobs]
+    results.update(zip(stills, encoded))
+    # After the stills: these seek the shared source frame by frame
+    for ext in animated:
+        results[ext] = encode_frames(ext)
+
+    return summary()
+
+
+def parse_targets(spec, valid_formats):
+    """'png,jpg' or ['png', 'jpg'] -> ['png', 'jpeg']; ValueError on unknown formats."""
+    if isinstance(spec, str):
+        spec = spec.split(",")
+    # Normalize aliases
+    target_exts = [ALIASES.get(ext.strip().lower(), ext.strip().lower()) for ext in spec if ext.strip()]
+    if not target_exts:
+        raise ValueError("no target format given")
+    for target_ext in target_exts:
+        if target_ext not in valid_formats:
+            raise ValueError(f"Unsupported format: {target_ext}")
+    return target_exts
+
+
+def estimate_memory(input_file):
+    """Rough peak bytes to convert a file, from its header alone.
+
+    Counts the decoded image and one mode-converted copy at 4 bytes per pixel;
+    deliberately ignores draft/reduce savings so the budget errs on the safe side.
+    """
+    try:
+        from PIL import Image
+
+        load_plugins(get_valid_formats().get(os.path.splitext(input_file)[1].lstrip(".").lower()))
+        with Image.open(input_file) as im:
+            width, height = im.size
+    except Exception:
+        return 0  # convert_file will report the problem
+    return width * height * 4 * 2
+
+
+def peak_rss():
+    """(this process, largest finished worker) peak resident set size in MB, or None."""
+    try:
+        import resource
+    except ImportError:
+        return None  # not on Windows
+    unit = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    return tuple(resource.getrusage(who).ru_maxrss * unit / (1 << 20)
+                 for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+
+
+def convert_batch(input_files, target_exts, valid_formats, jobs=1, ordered=True, threads=1, cache=None,
+                  max_size=None, mem_budget=None, encoding=None):
+    """Convert many files, yielding (ok, message, cache_hits) for each.
+
+    With jobs > 1 the files are fanned out over a process pool, keeping at most
+    a few jobs per worker in flight. Results come back in input order unless
+    `ordered` is False, in which case each is reported as soon as it finishes.
+    With a `mem_budget` (bytes), a job is only submitted once the estimated
+    memory of everything in flight leaves room for it; a job bigger than the
+    whole budget runs on its own.
+    """
+    if jobs <= 1:
+        for file in input_files:
+            yield convert_file(file, target_exts, valid_formats, threads, cache, max_size, encoding)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    max_in_flight = 4 * jobs
+    costs = {}  # future -> estimated bytes
+    in_use = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque() if ordered else set()
+
+        def finished():
+            """Wait for the oldest job (ordered) or any job, and return the done futures."""
+            nonlocal pending
+            if ordered:
+                return [pending.popleft()]
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            return done
+
+        for file in input_files:
+            cost = estimate_memory(file) if mem_budget else 0
+            while pending and (len(pending) >= max_in_flight or
+                               (mem_budget and in_use + cost > mem_budget)):
+                for future in finished():
+                    in_use -= costs.pop(future)
+                    yield future.result()
+
+            future = pool.submit(convert_file, file, target_exts, valid_formats, threads, cache, max_size,
+                                 encoding)
+            costs[future] = cost
+            in_use += cost
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+
+        while pending:
+            for future in finished():
+                in_use -= costs.pop(future)
+                yield future.result()
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--cache-dir", help="Reuse outputs of unchanged inputs from this cache directory")
+    parser.add_argument("--cache-mb", type=int, default=1024,
+                        help="Evict least recently used cache entries beyond this size (default: 1024)")
+
+
+def cache_from_args(args):
+    return OutputCache(args.cache_dir, args.cache_mb << 20) if args.cache_dir else None
+
+
+def parse_size(text):
+    """'200K', '1.5M' or '50000' -> bytes."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().rstrip("B")
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a size: {text!r}")
+
+
+def add_encoding_arguments(parser):
+    parser.add_argument("--profile", choices=sorted(PROFILES),
+                        help="Encoder options: fast, balanced or small (default: Pillow's defaults)")
+    goal = parser.add_mutually_exclusive_group()
+    goal.add_argument("--target-size", type=parse_size, metavar="SIZE",
+                      help="Pick the highest JPEG/WebP/AVIF quality that fits in SIZE (e.g. 200K)")
+    goal.add_argument("--auto", dest="auto_bpp", action="store_const", const=1.0,
+                      help="Like --target-size, with the goal scaled to the image: 1 bit per pixel")
+    goal.add_argument("--auto-bpp", dest="auto_bpp", type=float, metavar="BPP",
+                      help="Like --auto, with a goal of BPP bits per pixel")
+
+
+def encoding_from_args(args):
+    encoding = {"profile": args.profile, "target_size": args.target_size, "auto_bpp": args.auto_bpp}
+    return {name: value for name, value in encoding.items() if value} or None
+
+
+def warm_worker():
+    """Pool initializer: import Pillow and load the format table up front."""
+    import signal
+    from PIL import Image  # noqa: F401
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C is the server's to handle
+
+    load_format_table()
+
+
+def run_job(job, valid_formats, cache=None):
+    """Run one server job dict, returning its result dict."""
+    result = {"id": job.get("id"), "input": job.get("input")}
+    encoding = {name: job[name] for name in ("profile", "target_size", "auto_bpp") if job.get(name)}
+    ok, message, hits = convert_file(job["input"], job["targets"], valid_formats, job.get("threads", 1), cache,
+                                     encoding=encoding or None)
+    result.update(ok=ok, message=message, cache_hits=hits)
+    return result
+
+
+def serve_stream(rfile, wfile, pool, valid_formats, cache=None):
+    """Read JSON jobs from rfile, run them on the pool, write results to wfile as they finish."""
+    lock = threading.Condition()
+    outstanding = 0  # jobs whose result has not been written yet
+
+    def send(result):
+        with lock:
+            try:
+                wfile.write(json.dumps(result).encode("utf-8") + b"\n")
+                wfile.flush()
+            except OSError:
+                pass  # client went away; keep draining its jobs
+
+    def finished(future, job):
+        nonlocal outstanding
+        error = future.exception()
+        if error is None:
+            send(future.result())
         else:
-            im.save(output_file, valid_formats[target_ext])
+            send({"id": job["id"], "input": job["input"], "ok": False,
+                  "message": f"❌ Worker failed for {job['input']}: {error}"})
+        with lock:
+            outstanding -= 1
+            lock.notify_all()
 
-        print(f"✅ Saved: {output_file}")
+    for number, line in enumerate(rfile, 1):
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict) or not isinstance(job.get("input"), str):
+                raise ValueError("each job needs an \"input\" path")
+            job.setdefault("id", number)
+            job["targets"] = parse_targets(job.get("targets", ""), valid_formats)
+        except ValueError as e:
+            send({"id": number, "ok": False, "message": f"❌ Bad job on line {number}: {e}"})
+            continue
+        with lock:
+            outstanding += 1
+        future = pool.submit(run_job, job, valid_formats, cache)
+        future.add_done_callback(lambda f, job=job: finished(f, job))
 
-    except Exception as e:
-        print(f"❌ Conversion failed for {input_file}: {e}")
+    # The callbacks, not the futures, write the results: wait for them
+    with lock:
+        lock.wait_for(lambda: outstanding == 0)
+    if cache is not None:
+        cache.evict()
+
+
+def serve_main(argv):
+    parser = argparse.ArgumentParser(prog="imgconvert.py serve",
+                                     description="Run a long-lived converter fed with JSON jobs.")
+    parser.add_argument("--socket", help="Listen on this Unix socket (default: read jobs from stdin)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per CPU)")
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.socket and os.path.lexists(args.socket):
+        import socket
+        import stat
+
+        # Only ever replace a stale socket: not a file, not a live server
+        if not stat.S_ISSOCK(os.lstat(args.socket).st_mode):
+            print(f"❌ {args.socket} exists and is not a socket", file=sys.stderr)
+            sys.exit(1)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(args.socket)
+            except OSError:
+                os.unlink(args.socket)  # stale socket from an earlier run
+            else:
+                print(f"❌ A server is already listening on {args.socket}", file=sys.stderr)
+                sys.exit(1)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    valid_formats = get_valid_formats()
+    cache = cache_from_args(args)
+    pool = ProcessPoolExecutor(max_workers=max(1, args.jobs), initializer=warm_worker)
+
+    try:
+        if not args.socket:
+            serve_stream(sys.stdin.buffer, sys.stdout.buffer, pool, valid_formats, cache)
+            return
+
+        import socketserver
+
+        class JobHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                serve_stream(self.rfile, self.wfile, pool, valid_formats, cache)
+
+        class JobServer(socketserver.ThreadingUnixStreamServer):
+            daemon_threads = True
+
+        server = JobServer(args.socket, JobHandler)
+        print(f"🟢 Serving on {args.socket} with {args.jobs} workers (Ctrl-C to stop)", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            os.unlink(args.socket)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def client_main(argv):
+    parser = argparse.ArgumentParser(prog="imgconvert.py client",
+                                     description="Send conversions to a running `serve --socket`.")
+    parser.add_argument("--socket", required=True, help="The server's Unix socket")
+    parser.add_argument("paths", nargs="+", help="Input file(s) or wildcards, then the target format(s)")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Encode multiple target formats of one file in parallel threads")
+    args = parser.parse_args(argv)
+
+    if len(args.paths) < 2:
+        parser.error("need at least one input file and a target format")
+
+    input_files = []
+    for arg in args.paths[:-1]:
+        input_files.extend(glob(arg))  # expand wildcards
+
+    if not input_files:
+        print("❌ No files found to convert.")
+        sys.exit(1)
+
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(args.socket)
+    except OSError as e:
+        print(f"❌ Cannot reach server at {args.socket}: {e}")
+        sys.exit(1)
+
+    def send_jobs():
+        # Separate thread, so results can be read while jobs are still going out
+        with sock.makefile("wb") as wfile:
+            for number, file in enumerate(input_files, 1):
+                job = {"id": number, "input": os.path.abspath(file), "targets": args.paths[-1],
+                       "threads": args.threads}
+                wfile.write(json.dumps(job).encode("utf-8") + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+
+    sender = threading.Thread(target=send_jobs, daemon=True)
+    sender.start()
+
+    failed = done = 0
+    with sock.makefile("rb") as rfile:
+        for line in rfile:
+            result = json.loads(line)
+            print(result["message"])
+            done += 1
+            failed += not result["ok"]
+    sender.join()
+    sock.close()
+
+    if done < len(input_files):
+        print(f"❌ Server closed the connection after {done} of {len(input_files)} results")
+        failed += len(input_files) - done
+    if len(input_files) > 1 or failed:
+        print(f"\n{len(input_files) - failed} converted, {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
+class InotifyWatcher:
+    """New files in one directory via inotify: IN_CLOSE_WRITE and IN_MOVED_TO, no scanning.
+
+    If the kernel's event queue overflows, the folder is scanned once and only the
+    files `outdated(name)` says still need converting are returned.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    def __init__(self, folder, outdated=None):
+        import ctypes
+        import ctypes.util
+        import struct
+
+        self.folder = folder
+        self.outdated = outdated or (lambda name: True)
+        self.header = struct.Struct("iIII")  # wd, mask, cookie, len
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), self.IN_CLOSE_WRITE | self.IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {folder}")
+
+    def wait(self, timeout):
+        """Names written or moved into the folder within timeout seconds."""
+        import select
+
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = self.header.unpack_from(data, offset)
+            offset += self.header.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                # The kernel dropped events: fall back to one scan of the folder
+                print("⚠️  inotify queue overflowed, rescanning", file=sys.stderr)
+                names.extend(entry.name for entry in os.scandir(self.folder)
+                             if entry.is_file() and self.outdated(entry.name))
+            elif name and not mask & self.IN_ISDIR:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback for systems without inotify: rescan the folder every `interval` seconds."""
+
+    def __init__(self, folder, interval):
+        self.folder = folder
+        self.interval = interval
+        self.seen = self.scan()
+
+    def scan(self):
+        seen = {}
+        for entry in os.scandir(self.folder):
+            try:
+                if entry.is_file():
+                    st = entry.stat()
+                    seen[entry.name] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                pass  # removed mid-scan
+        return seen
+
+    def wait(self, timeout):
+        """Names that are new or changed since the last scan."""
+        time.sleep(min(timeout, self.interval))
+        seen = self.scan()
+        names = [name for name, state in seen.items() if self.seen.get(name) != state]
+        self.seen = seen
+        return names
+
+    def close(self):
+        pass
+
+
+class WatchStats:
+    """Queue depth and landing-to-converted latency for watch mode."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queued = self.done = self.failed = self.max_depth = 0
+        self.latencies = deque(maxlen=1000)  # seconds, most recent conversions
+
+    def submitted(self):
+        with self.lock:
+            self.queued += 1
+            self.max_depth = max(self.max_depth, self.queued - self.done)
+
+    def finished(self, ok, latency):
+        with self.lock:
+            self.done += 1
+            self.failed += not ok
+            self.latencies.append(latency)
+
+    def summary(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            depth = self.queued - self.done
+            text = f"📊 queue {depth} (max {self.max_depth}) | {self.done} converted, {self.failed} failed"
+        if latencies:
+            p50 = latencies[len(latencies) // 2] * 1000
+            p95 = latencies[int(len(latencies) * 0.95)] * 1000
+            text += f" | latency p50 {p50:.0f} ms, p95 {p95:.0f} ms, max {latencies[-1] * 1000:.0f} ms"
+        return text
+
+
+def watch_main(argv):
+    parser = argparse.ArgumentParser(prog="imgconvert.py watch",
+                                     description="Convert images as they land in a directory.")
+    parser.add_argument("folder", help="Directory to watch (not recursive)")
+    parser.add_argument("target", help="Target format(s), comma-separated")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--debounce-ms", type=float, default=50,
+                        help="Wait this long after the last write to a file before converting it")
+    parser.add_argument("--existing", action="store_true", help="Also convert files already in the folder")
+    parser.add_argument("--poll", type=float, metavar="SECONDS",
+                        help="Poll every SECONDS instead of using inotify")
+    parser.add_argument("--stats-interval", type=float, default=60,
+                        help="Print queue/latency stats every N seconds (0 to disable)")
+    parser.add_argument("--max-size", type=int, help="Shrink images to fit N x N pixels while decoding")
+    add_encoding_arguments(parser)
+    add_cache_arguments(parser)
+    args = parser.parse_args(argv)
+
+    import heapq
+    from concurrent.futures import ProcessPoolExecutor
+
+    valid_formats = get_valid_formats()
+    try:
+        target_exts = parse_targets(args.target, valid_formats)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if not os.path.isdir(args.folder):
+        print(f"❌ Not a directory: {args.folder}")
+        sys.exit(1)
+
+    def wanted(name):
+        ext = os.path.splitext(name)[1].lstrip(".").lower()
+        # Skip our own outputs, hidden/partial uploads and anything Pillow can't read
+        return not name.startswith(".") and ext in valid_formats and ext not in target_exts \
+            and not name.endswith(".cache-tmp")
+
+    def outdated(name):
+        """True if any target output of `name` is missing or older than it."""
+        base = os.path.join(args.folder, os.path.splitext(name)[0])
+        try:
+            mtime = os.stat(os.path.join(args.folder, name)).st_mtime_ns
+        except OSError:
+            return False  # gone again
+        for ext in target_exts:
+            try:
+                if os.stat(f"{base}.{ext}").st_mtime_ns < mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    watcher = None
+    if args.poll is None:
+        try:
+            watcher = InotifyWatcher(args.folder, outdated)
+        except (OSError, AttributeError) as e:  # AttributeError: no inotify in this libc
+            print(f"⚠️  inotify unavailable ({e}), polling every second instead", file=sys.stderr)
+    if watcher is None:
+        watcher = PollingWatcher(args.folder, args.poll or 1.0)
+    # A poll can't see the file being closed, so it must stay unchanged for a whole interval
+    debounce = args.debounce_ms / 1000
+    if isinstance(watcher, PollingWatcher):
+        debounce = max(debounce, watcher.interval)
+
+    cache = cache_from_args(args)
+    encoding = encoding_from_args(args)
+    stats = WatchStats()
+    deadlines = {}  # name -> time it becomes due (pushed back by every new write)
+    landed = {}  # name -> time of the first event, for latency
+    heap = []  # (deadline, name); stale entries are skipped
+
+    def schedule(names, now):
+        for name in names:
+            if wanted(name):
+                deadlines[name] = now + debounce
+                landed.setdefault(name, now)
+                heapq.heappush(heap, (deadlines[name], name))
+
+    pool = ProcessPoolExecutor(max_workers=max(1, args.jobs), initializer=warm_worker)
+    # Start (and warm) every worker now rather than when the first file lands
+    for future in [pool.submit(os.getpid) for _ in range(max(1, args.jobs))]:
+        future.result()
+
+    def submit(name):
+        start = landed.pop(name)
+        path = os.path.join(args.folder, name)
+        future = pool.submit(convert_file, path, target_exts, valid_formats, 1, cache, args.max_size, encoding)
+
+        def report(future):
+            if future.cancelled():
+                return  # queued when Ctrl-C came
+            try:
+                ok, message, _ = future.result()
+            except Exception as e:
+                ok, message = False, f"❌ Worker failed for {path}: {e}"
+            stats.finished(ok, time.monotonic() - start)
+            print(message, flush=True)
+
+        stats.submitted()
+        future.add_done_callback(report)
+
+    kind = "inotify" if isinstance(watcher, InotifyWatcher) else f"polling every {watcher.interval:g}s"
+    print(f"👀 Watching {args.folder} ({kind}) -> {','.join(target_exts)} with {args.jobs} workers "
+          f"(Ctrl-C to stop)", file=sys.stderr)
+    if args.existing:
+        schedule((entry.name for entry in os.scandir(args.folder) if entry.is_file()), time.monotonic())
+
+    next_stats = time.monotonic() + args.stats_interval if args.stats_interval else float("inf")
+    try:
+        while True:
+            now = time.monotonic()
+            timeout = min(heap[0][0] if heap else now + 1.0, next_stats) - now
+            schedule(watcher.wait(max(0.0, timeout)), time.monotonic())
+
+            now = time.monotonic()
+            while heap and heap[0][0] <= now:
+                deadline, name = heapq.heappop(heap)
+                if deadlines.get(name) == deadline:  # not written to again since
+                    del deadlines[name]
+                    submit(name)
+            if now >= next_stats:
+                print(stats.summary(), file=sys.stderr)
+                next_stats = now + args.stats_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        pool.shutdown(cancel_futures=True)
+        if cache is not None:
+            cache.evict()
+        print(stats.summary(), file=sys.stderr)
 
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: imgconvert.py input_file(s) target_format")
+        print("Usage: imgconvert.py input_file(s) target_format[,target_format...] [-j N] [--unordered]")
         print("       imgconvert.py formats")
+        print("       imgconvert.py serve [--socket PATH] [-j N]")
+        print("       imgconvert.py client --socket PATH input_file(s) target_format")
+        print("       imgconvert.py watch DIR target_format [-j N]")
         sys.exit(1)
 
     if sys.argv[1].lower() == "formats":
         show_formats()
         sys.exit(0)
 
-    # Last argument is target format
-    target_ext = sys.argv[-1].lower()
+    if sys.argv[1] == "serve":
+        serve_main(sys.argv[2:])
+        sys.exit(0)
 
-    # Normalize aliases
-    if target_ext in ALIASES:
-        target_ext = ALIASES[target_ext]
+    if sys.argv[1] == "client":
+        client_main(sys.argv[2:])
+        sys.exit(0)
 
-    valid_formats = get_valid_formats()
+    if sys.argv[1] == "watch":
+        watch_main(sys.argv[2:])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(prog="imgconvert.py", description="Convert images between formats.")
+    parser.add_argument("paths", nargs="+",
+                        help="Input file(s) or wildcards, then the target format(s), comma-separated")
+    parser.add_argument("-j", "--jobs", type=int,
+                        help="Convert in parallel across N processes (default: 1, or one per CPU with --mem-budget)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="With -j, report each result as soon as it finishes")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Encode multiple target formats of one file in parallel threads")
+    add_encoding_arguments(parser)
+    add_cache_arguments(parser)
+    parser.add_argument("--max-size", type=int,
+                        help="Shrink images to fit N x N pixels while decoding (keeps aspect ratio)")
+    parser.add_argument("--mem-budget", type=int, metavar="MB",
+                        help="Only run as many parallel conversions as fit in this much memory")
+    args = parser.parse_args()
 
-    if target_ext not in valid_formats:
-        print(f"❌ Unsupported format: {target_ext}")
+    if args.jobs is None:
+        args.jobs = (os.cpu_count() or 1) if args.mem_budget else 1
+
+    if len(args.paths) < 2:
+        parser.error("need at least one input file and a target format")
+
+    # Last argument is the target format(s)
+    valid_formats = get_valid_formats()
+    try:
+        target_exts = parse_targets(args.paths[-1], valid_formats)
+    except ValueError as e:
+        print(f"❌ {e}")
         print(f"Run `imgconvert formats` to see all supported formats.")
         sys.exit(1)
 
     # All preceding args are files (support wildcards)
     input_files = []
-    for arg in sys.argv[1:-1]:
+    for arg in args.paths[:-1]:
         input_files.extend(glob(arg))  # expand wildcards
 
     if not input_files:
         print("❌ No files found to convert.")
         sys.exit(1)
 
-    for file in input_files:
-        convert_file(file, target_ext, valid_formats)
+    cache = cache_from_args(args)
+    failed = hits = 0
+    mem_budget = args.mem_budget << 20 if args.mem_budget else None
+    for ok, message, cache_hits in convert_batch(input_files, target_exts, valid_formats, args.jobs,
+                                                 ordered=not args.unordered, threads=args.threads,
+                                                 cache=cache, max_size=args.max_size,
+                                                 mem_budget=mem_budget, encoding=encoding_from_args(args)):
+        print(message)
+        failed += not ok
+        hits += cache_hits
+
+    if len(input_files) > 1 or failed:
+        print(f"\n{len(input_files) - failed} converted, {failed} failed")
+    if cache is not None:
+        cache.evict()
+        lookups = len(input_files) * len(target_exts)
+        print(f"♻️  Cache: {hits} hits, {lookups - hits} misses ({args.cache_dir})")
+    rss = peak_rss()
+    if rss and (args.max_size or args.mem_budget):
+        print(f"📈 Peak RSS: {rss[0]:.0f} MB" + (f", largest worker {rss[1]:.0f} MB" if args.jobs > 1 else ""))
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
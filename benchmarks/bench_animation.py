@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+bench_animation.py - Peak RSS of multi-frame conversion against frame count
+
+Writes synthetic animated GIFs of increasing length, converts each with
+image_conv_cmd.py in its own process and reports wall time and peak RSS. If
+frames are streamed, peak memory stays flat as the frame count grows; the
+run fails when the memory cost per extra frame is more than --max-slope of
+one decoded frame.
+
+The GIF and APNG writers keep their own list of frames, so only targets that
+encode as they go (webp, tif, pdf) are expected to pass.
+
+Usage:
+    bench_animation.py [--frames 100 400 1600] [--size 320x240] [--target webp] [--max-slope 0.1]
+"""
+
+import argparse
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+SCRIPT = pathlib.Path(__file__).resolve().parent.parent / "Image_Converter" / "image_conv_cmd.py"
+
+
+def make_gif(path, frames, size):
+    """A ball bouncing over a gradient, `frames` frames long."""
+    width, height = size
+    background = Image.linear_gradient("L").resize(size).convert("RGB")
+
+    def frame(i):
+        im = background.copy()
+        x = (i * 7) % (width - 40)
+        y = abs((i * 5) % (2 * (height - 40)) - (height - 40))
+        ImageDraw.Draw(im).ellipse((x, y, x + 40, y + 40), fill=(255, (i * 3) % 256, 0))
+        return im.convert("P", palette=Image.ADAPTIVE, colors=64)
+
+    first = frame(0)
+    first.save(path, save_all=True, append_images=(frame(i) for i in range(1, frames)),
+               duration=40, loop=0)
+
+
+def generate(paths_and_frames, size):
+    """Write the GIFs from a separate process: ru_maxrss survives fork+exec, so a
+    parent grown by the GIF writer would inflate every measurement after it."""
+    specs = [f"{path}:{frames}" for path, frames in paths_and_frames]
+    subprocess.run([sys.executable, __file__, "--generate", *specs, "--size", "x".join(map(str, size))],
+                   check=True)
+
+
+def convert(path, target):
+    """(seconds, peak RSS in MB) of converting path in a fresh process."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, str(SCRIPT), str(path), target], stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode:
+        raise RuntimeError(f"conversion of {path} failed")
+    unit = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    return time.perf_counter() - start, usage.ru_maxrss * unit / (1 << 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that multi-frame conversion memory stays flat.")
+    parser.add_argument("--frames", type=int, nargs="+", default=[100, 400, 1600])
+    parser.add_argument("--size", default="320x240", help="Frame size")
+    parser.add_argument("--target", default="webp", help="Target format")
+    parser.add_argument("--max-slope", type=float, default=0.1,
+                        help="Max extra memory per frame, as a fraction of one decoded RGBA frame")
+    parser.add_argument("--generate", nargs="+", metavar="PATH:FRAMES", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.split("x"))
+    if args.generate:
+        for spec in args.generate:
+            path, frames = spec.rsplit(":", 1)
+            make_gif(path, int(frames), size)
+        return
+
+    frame_mb = size[0] * size[1] * 4 / (1 << 20)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        gifs = [(pathlib.Path(tmp) / f"anim_{frames}.gif", frames) for frames in sorted(args.frames)]
+        generate(gifs, size)
+        for path, frames in gifs:
+            seconds, peak = convert(path, args.target)
+            rows.append((frames, seconds, peak))
+            print(f"{frames:6} frames  {seconds:7.2f}s  peak {peak:7.1f} MB")
+
+    (first_frames, _, first_peak), (last_frames, _, last_peak) = rows[0], rows[-1]
+    slope = (last_peak - first_peak) / max(1, last_frames - first_frames)
+    print(f"\n{slope * 1024:.1f} KB per extra frame (one decoded frame is {frame_mb * 1024:.0f} KB)")
+    if slope > args.max_slope * frame_mb:
+        print(f"❌ Memory grows with frame count: frames are being held, not streamed")
+        sys.exit(1)
+    print("✅ Peak memory is flat in the frame count")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+bench_remove_background.py - Vectorized colour key vs the original per-pixel loop
+
+Runs bg_remove_core.remove_background and the per-pixel loop the Qt app used
+to run on the same synthetic photo, checks the outputs are bit-identical for
+the presets and a few random ranges, and fails if the speed-up is below
+--min-speedup. Pillow 10+ made per-pixel access several times faster, so
+the loop baseline (and the ratio) depends a lot on the installed Pillow.
+
+Usage:
+    bench_remove_background.py [--size 2000x1500] [--min-speedup 20]
+"""
+
+import argparse
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "Background_Remover"))
+from bg_remove_core import PRESETS, remove_background  # noqa: E402
+from corpus import draw_image  # noqa: E402
+
+
+def remove_background_loop(image, min_rgb, max_rgb):
+    """The loop from BackgroundRemoverApp.remove_background before it moved to NumPy."""
+    image = image.convert("RGBA")
+    pixels = image.load()
+    min_r, min_g, min_b = min_rgb
+    max_r, max_g, max_b = max_rgb
+    width, height = image.size
+    for y in range(height):
+        for x in range(width):
+            r, g, b, a = pixels[x, y]
+            if min_r <= r <= max_r and min_g <= g <= max_g and min_b <= b <= max_b:
+                pixels[x, y] = (255, 255, 255, 0)
+    return image
+
+
+def timed(func, *args, repeat=1):
+    """(result, best wall time of `repeat` calls)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized background removal.")
+    parser.add_argument("--size", default="2000x1500", help="Size of the synthetic photo")
+    parser.add_argument("--min-speedup", type=float, default=20)
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.split("x"))
+    rnd = random.Random(1234)
+    image = draw_image(size, rnd)
+
+    # Equality on a smaller crop for the extra ranges, so the slow loop stays quick
+    crop = image.crop((0, 0, min(size[0], 400), min(size[1], 300)))
+    ranges = list(PRESETS.values())
+    for _ in range(5):
+        pairs = [sorted((rnd.randrange(-10, 266), rnd.randrange(-10, 266))) for _ in range(3)]
+        ranges.append((tuple(low for low, _ in pairs), tuple(high for _, high in pairs)))
+    for min_rgb, max_rgb in ranges:
+        if remove_background(crop, min_rgb, max_rgb).tobytes() != \
+                remove_background_loop(crop, min_rgb, max_rgb).tobytes():
+            print(f"❌ Output differs from the loop for {min_rgb}..{max_rgb}")
+            sys.exit(1)
+    print(f"✅ Bit-identical to the loop for {len(ranges)} colour ranges")
+
+    min_rgb, max_rgb = PRESETS["White"]
+    expected, loop_seconds = timed(remove_background_loop, image, min_rgb, max_rgb)
+    result, numpy_seconds = timed(remove_background, image, min_rgb, max_rgb, repeat=5)
+    if result.tobytes() != expected.tobytes():
+        print("❌ Output differs from the loop on the full image")
+        sys.exit(1)
+
+    speedup = loop_seconds / numpy_seconds
+    megapixels = size[0] * size[1] / 1e6
+    print(f"loop:  {loop_seconds:8.3f}s  ({megapixels / loop_seconds:7.2f} MP/s)")
+    print(f"numpy: {numpy_seconds:8.3f}s  ({megapixels / numpy_seconds:7.2f} MP/s)")
+    print(f"speed-up: {speedup:.0f}x")
+    if speedup < args.min_speedup:
+        print(f"❌ Below the {args.min_speedup:.0f}x target")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+bench_segmented_mov.py - Wall time of single-process vs segmented MOV transcoding
+
+Generates a synthetic MOV (test pattern + tone) with ffmpeg, converts it with
+convert_media twice - once as a single x264 job, once with --segment-seconds -
+and compares wall time of the two. Fails unless the segmented output has the
+same frame count, and its video duration, audio duration and audio start
+(relative to the video) match the single-process output to within one frame.
+
+Usage:
+    bench_segmented_mov.py [--seconds 240] [--size 1920x1080] [--segment-seconds 30] [--segment-jobs 4]
+    bench_segmented_mov.py --clip IMG_1234.MOV [--segment-seconds 30]   # a real (e.g. iPhone) clip
+"""
+
+import argparse
+import json
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "Apple_Image_Converter"))
+from apple_to_standard import convert_media  # noqa: E402
+
+
+def make_clip(path, seconds, size):
+    """Synthetic H.264/PCM MOV with B-frames (PCM audio so the auto mode can't just remux it)."""
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y",
+         "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30:duration={seconds}",
+         "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+         "-c:v", "libx264", "-preset", "veryfast", "-bf", "3", "-g", "60", "-c:a", "pcm_s16le", str(path)],
+        check=True)
+
+
+def probe(path):
+    """Frame count, frame rate, and per-stream durations and start times of a media file."""
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-count_packets",
+         "-show_entries", "stream=codec_type,nb_read_packets,r_frame_rate,duration,start_time",
+         "-of", "json", str(path)],
+        check=True, capture_output=True, text=True).stdout
+    streams = {s["codec_type"]: s for s in json.loads(out)["streams"]}
+    video, audio = streams["video"], streams["audio"]
+    num, den = video["r_frame_rate"].split("/")
+    return {
+        "frames": int(video["nb_read_packets"]),
+        "fps": int(num) / int(den),
+        "video duration": float(video["duration"]),
+        "audio duration": float(audio["duration"]),
+        "audio start": float(audio["start_time"]) - float(video["start_time"]),
+    }
+
+
+def timed_run(src_dir, out_dir, **kwargs):
+    start = time.perf_counter()
+    convert_media(src_dir, out_dir, video_mode="transcode", **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark segmented vs single-process MOV transcoding.")
+    parser.add_argument("--seconds", type=int, default=240, help="Length of the synthetic clip")
+    parser.add_argument("--size", default="1920x1080", help="Frame size of the synthetic clip")
+    parser.add_argument("--clip", type=pathlib.Path, help="Use this MOV instead of a synthetic clip")
+    parser.add_argument("--segment-seconds", type=float, default=30)
+    parser.add_argument("--segment-jobs", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        (tmp / "src").mkdir()
+        if args.clip:
+            (tmp / "src" / "clip.mov").symlink_to(args.clip.resolve())
+        else:
+            make_clip(tmp / "src" / "clip.mov", args.seconds, args.size)
+
+        single = timed_run(tmp / "src", tmp / "single")
+        segmented = timed_run(tmp / "src", tmp / "segmented", segment_seconds=args.segment_seconds,
+                              segment_jobs=args.segment_jobs)
+
+        expected = probe(tmp / "single" / "clip.mp4")
+        got = probe(tmp / "segmented" / "clip.mp4")
+
+    for name, seconds, info in (("single", single, expected), ("segmented", segmented, got)):
+        print(f"{name + ':':10} {seconds:8.2f}s  {info['frames']} frames  video {info['video duration']:.3f}s  "
+              f"audio {info['audio duration']:.3f}s from {info['audio start']:+.3f}s")
+    print(f"speed-up:  {single / segmented:8.2f}x")
+
+    failures = []
+    if got["frames"] != expected["frames"]:
+        failures.append(f"frame count {got['frames']} != {expected['frames']}")
+    frame = 1 / expected["fps"]
+    for key in ("video duration", "audio duration", "audio start"):
+        if abs(got[key] - expected[key]) > frame:
+            failures.append(f"{key} off by {got[key] - expected[key]:+.3f}s (one frame is {frame:.3f}s)")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Same frames, and video and audio line up to within one frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+bench_startup.py - Cold-start regression check for image_conv_cmd.py
+
+Converts a small PNG to WebP with image_conv_cmd.py (after one warm-up run that
+fills the format cache) under a wrapper that times the whole run, from the
+first import to exit, and lists the Pillow plugin modules in sys.modules at
+exit. Fails if the median time or the number of plugins goes over budget.
+Also reports the median wall time of the same conversion as a whole process,
+interpreter start-up included.
+
+Usage:
+    bench_startup.py [--budget-ms 150] [--max-plugins 8] [--runs 10]
+"""
+
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT = pathlib.Path(__file__).resolve().parent.parent / "Image_Converter" / "image_conv_cmd.py"
+
+
+# Runs the script as __main__; on exit, reports the time since the wrapper started
+# and every plugin module loaded (whether by import statement or importlib)
+WRAPPER = """
+import atexit, json, os, runpy, sys, time
+start = time.perf_counter()
+
+def report():
+    plugins = sorted(name for name in sys.modules if name.startswith("PIL.") and name.endswith("ImagePlugin"))
+    print(json.dumps({"us": (time.perf_counter() - start) * 1e6, "plugins": plugins}), file=sys.stderr)
+
+atexit.register(report)
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def startup_profile(*args):
+    """(µs from first import to exit, loaded plugin module names) for one run of the converter."""
+    stderr = subprocess.run([sys.executable, "-c", WRAPPER, str(SCRIPT), *args],
+                            check=True, capture_output=True, text=True).stderr
+    report = json.loads(stderr.strip().splitlines()[-1])
+    return report["us"], [name.rsplit(".", 1)[1] for name in report["plugins"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check image_conv_cmd.py startup against a budget.")
+    parser.add_argument("--budget-ms", type=float, default=150, help="Max time from first import to exit")
+    parser.add_argument("--max-plugins", type=int, default=8, help="Max Pillow plugins imported")
+    parser.add_argument("--runs", type=int, default=10, help="Runs to take the median over")
+    args = parser.parse_args()
+
+    subprocess.run([sys.executable, str(SCRIPT), "formats"], check=True, capture_output=True)  # warm cache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        from PIL import Image
+
+        sample = pathlib.Path(tmp) / "sample.png"
+        Image.new("RGB", (64, 64), (200, 30, 30)).save(sample)
+
+        profiles = [startup_profile(str(sample), "webp") for _ in range(args.runs)]
+        startup_ms = statistics.median(total for total, _ in profiles) / 1000
+        plugins = profiles[0][1]
+
+        walls = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, str(SCRIPT), str(sample), "webp"], check=True, capture_output=True)
+            walls.append(time.perf_counter() - start)
+
+    print(f"startup:      {startup_ms:8.1f} ms (budget {args.budget_ms:g} ms)")
+    print(f"plugins:      {len(plugins):8d} (budget {args.max_plugins}): {', '.join(plugins)}")
+    print(f"PNG -> WebP:  {statistics.median(walls) * 1000:8.1f} ms wall per process")
+
+    if startup_ms > args.budget_ms or len(plugins) > args.max_plugins:
+        print("❌ Startup over budget")
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+bench_suite.py - Repeatable timings for each tool's hot path, with regression checks
+
+`run` builds (or reuses) the synthetic corpus from corpus.py and times every
+benchmark in its own process, so each one reports its own peak RSS next to the
+median wall time, images/s and MB/s of input. Benchmarks whose dependencies
+are missing (pillow_heif, ffmpeg, NumPy) are skipped. `compare` reads two
+results files and exits 1 if any benchmark got slower (or bigger) than the
+threshold.
+
+Usage:
+    bench_suite.py run [-o results.json] [--corpus DIR] [--scale 1.0] [--repeat 5] [-k FILTER]
+    bench_suite.py compare OLD.json NEW.json [--threshold 0.10]
+
+Results format:
+    {"meta": {"python": ..., "pillow": ..., "corpus": <digest>, ...},
+     "results": {"<benchmark>": {"seconds": <median>, "runs": [...], "items": N, "bytes": N,
+                                 "items_per_s": ..., "mb_per_s": ..., "peak_rss_mb": ...}}}
+"""
+
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import PIL
+
+from corpus import load_corpus
+
+REPO = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO / "Image_Converter"))
+sys.path.insert(0, str(REPO / "Apple_Image_Converter"))
+sys.path.insert(0, str(REPO / "Background_Remover"))
+
+IMAGE_TARGETS = ["png", "jpeg", "webp", "ico", "png,webp,jpeg,ico"]
+
+
+class Skip(Exception):
+    """A benchmark that cannot run here (missing dependency or empty corpus)."""
+
+
+def inputs(corpus, sub):
+    files = sorted((corpus / sub).iterdir())
+    if not files:
+        raise Skip(f"no {sub} files in the corpus")
+    return files
+
+
+def bench_image_convert(corpus, work, targets):
+    """Prepare a fresh copy of the images; return the timed conversion of all of them."""
+    from image_conv_cmd import convert_file, get_valid_formats, parse_targets
+
+    valid_formats = get_valid_formats()
+    target_exts = parse_targets(targets, valid_formats)
+    files = inputs(corpus, "images")
+    shutil.copytree(corpus / "images", work / "images")
+
+    def run():
+        for file in files:
+            ok, message, _ = convert_file(str(work / "images" / file.name), target_exts, valid_formats)
+            if not ok:
+                raise RuntimeError(message)
+
+    return run, files
+
+
+def bench_convert_media(corpus, work, sub):
+    try:
+        from apple_to_standard import convert_media
+    except ImportError as e:
+        raise Skip(f"apple_to_standard needs {e.name}")
+    if sub == "mov" and not shutil.which("ffmpeg"):
+        raise Skip("ffmpeg not found")
+    files = inputs(corpus, sub)
+
+    def run():
+        shutil.rmtree(work / "out", ignore_errors=True)
+        convert_media(corpus / sub, work / "out")
+
+    return run, files
+
+
+def bench_remove_background(corpus, work):
+    try:
+        from bg_remove_core import PRESETS, remove_background
+    except ImportError as e:
+        raise Skip(f"bg_remove_core needs {e.name}")
+    from PIL import Image
+
+    files = inputs(corpus, "images")
+    min_rgb, max_rgb = PRESETS["White"]
+
+    def run():
+        for file in files:
+            with Image.open(file) as im:
+                remove_background(im, min_rgb, max_rgb)
+
+    return run, files
+
+
+BENCHMARKS = {
+    **{f"image_convert[{targets}]": (bench_image_convert, targets) for targets in IMAGE_TARGETS},
+    "convert_media[heic]": (bench_convert_media, "heic"),
+    "convert_media[mov]": (bench_convert_media, "mov"),
+    "remove_background[white]": (bench_remove_background,),
+}
+
+
+def peak_rss_mb():
+    unit = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / (1 << 20)
+
+
+def run_one(name, corpus, repeat):
+    """Time one benchmark in this process and return its result dict."""
+    setup, *args = BENCHMARKS[name]
+    with tempfile.TemporaryDirectory() as work:
+        try:
+            run, files = setup(corpus, pathlib.Path(work), *args)
+        except Skip as e:
+            return {"skipped": str(e)}
+        run()  # warm-up: plugin imports, page cache
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            runs.append(time.perf_counter() - start)
+
+    seconds = statistics.median(runs)
+    size = sum(f.stat().st_size for f in files)
+    return {
+        "seconds": seconds,
+        "runs": runs,
+        "items": len(files),
+        "bytes": size,
+        "items_per_s": len(files) / seconds,
+        "mb_per_s": size / 1e6 / seconds,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    manifest = load_corpus(args.corpus, args.scale, args.seed)
+    meta = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "corpus": manifest["digest"],
+        "repeat": args.repeat,
+    }
+    results = {}
+    for name in BENCHMARKS:
+        if args.filter and args.filter not in name:
+            continue
+        # A process per benchmark, so the peak RSS is that benchmark's own
+        out = subprocess.run([sys.executable, __file__, "_one", name, "--corpus", str(args.corpus),
+                              "--repeat", str(args.repeat)],
+                             capture_output=True, text=True)
+        if out.returncode:
+            print(f"❌ {name} failed:\n{out.stderr.strip()}")
+            results[name] = {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "failed"}
+            continue
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        results[name] = result
+        if "skipped" in result:
+            print(f"⏭️  {name}: skipped ({result['skipped']})")
+        else:
+            print(f"✅ {name}: {result['seconds']:.3f}s  {result['items_per_s']:.1f} items/s  "
+                  f"{result['mb_per_s']:.1f} MB/s  peak {result['peak_rss_mb']:.0f} MB")
+
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump({"meta": meta, "results": results}, fh, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+def compare(args):
+    with open(args.old, encoding="utf-8") as fh:
+        old = json.load(fh)
+    with open(args.new, encoding="utf-8") as fh:
+        new = json.load(fh)
+
+    if old["meta"].get("corpus") != new["meta"].get("corpus"):
+        print("⚠️  The two runs used different corpora; timings are not comparable")
+
+    regressions = 0
+    print(f"{'benchmark':32} {'old':>9} {'new':>9} {'change':>8} {'peak MB':>15}")
+    for name in sorted(set(old["results"]) | set(new["results"])):
+        before, after = old["results"].get(name, {}), new["results"].get(name, {})
+        if "seconds" not in before or "seconds" not in after:
+            if "seconds" in before:
+                status = "not measured in the new run"
+            elif "seconds" in after:
+                status = "new benchmark"
+            else:
+                status = "not measured"
+            print(f"{name:32} {status}")
+            continue
+        change = after["seconds"] / before["seconds"] - 1
+        memory = after["peak_rss_mb"] / before["peak_rss_mb"] - 1
+        flag = ""
+        if change > args.threshold or memory > args.threshold:
+            flag = "❌ regression"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "✅ faster"
+        print(f"{name:32} {before['seconds']:8.3f}s {after['seconds']:8.3f}s {change:+8.1%} "
+              f"{before['peak_rss_mb']:6.0f} -> {after['peak_rss_mb']:<6.0f} {flag}")
+
+    if regressions:
+        print(f"\n❌ {regressions} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the converters.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks and write a results file")
+    run.add_argument("-o", "--output", default="bench_results.json", help="Results file to write")
+    run.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "bench-corpus"),
+                     help="Corpus directory (generated if missing)")
+    run.add_argument("--scale", type=float, default=1.0, help="Corpus image scale (e.g. 0.25 for a quick run)")
+    run.add_argument("--seed", type=int, default=1234)
+    run.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark (median is reported)")
+    run.add_argument("-k", dest="filter", help="Only run benchmarks whose name contains this")
+
+    cmp = commands.add_parser("compare", help="Compare two results files")
+    cmp.add_argument("old")
+    cmp.add_argument("new")
+    cmp.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown, as a fraction")
+
+    one = commands.add_parser("_one")  # internal: one benchmark, result as JSON on stdout
+    one.add_argument("name", choices=list(BENCHMARKS))
+    one.add_argument("--corpus", required=True)
+    one.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run_suite(args)
+    elif args.command == "compare":
+        compare(args)
+    else:
+        print(json.dumps(run_one(args.name, pathlib.Path(args.corpus), args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+corpus.py - Deterministic synthetic corpus for the benchmark suite
+
+Draws a fixed set of images (several sizes, modes and formats) from a seeded
+random generator, plus sample HEIC stills when pillow_heif is installed and
+short MOV clips when ffmpeg is on the PATH. The same seed and scale always
+give the same pixels; corpus.json records every file with its size and
+SHA-256 so results from different corpora are never compared by mistake.
+
+Layout:
+    DIR/images/   inputs for image_conv_cmd.py and the background remover
+    DIR/heic/     inputs for apple_to_standard.py (stills)
+    DIR/mov/      inputs for apple_to_standard.py (video)
+    DIR/corpus.json
+
+Usage:
+    corpus.py DIR [--scale 1.0] [--seed 1234]
+"""
+
+import argparse
+import hashlib
+import json
+import pathlib
+import random
+import shutil
+import subprocess
+
+from PIL import Image, ImageDraw
+
+# (name, size at scale 1.0, mode, format)
+IMAGES = [
+    ("photo_large", (4000, 3000), "RGB", "JPEG"),
+    ("photo_medium", (1920, 1080), "RGB", "JPEG"),
+    ("graphic_alpha", (1024, 1024), "RGBA", "PNG"),
+    ("grey", (2048, 1536), "L", "PNG"),
+    ("palette", (800, 600), "P", "GIF"),
+    ("scan", (2480, 3508), "RGB", "TIFF"),
+    ("icon_source", (512, 512), "RGBA", "WEBP"),
+    ("bitmap", (640, 480), "RGB", "BMP"),
+]
+
+HEIC = [("heic_photo", (3024, 4032)), ("heic_landscape", (4032, 3024))]
+
+# (name, seconds, size, video codec, audio codec): one clip the auto mode can
+# remux as-is, one it has to transcode
+MOVIES = [
+    ("clip_remux", 5, (1280, 720), "libx264", "aac"),
+    ("clip_transcode", 5, (1280, 720), "libx264", "pcm_s16le"),
+]
+
+EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "TIFF": "tif", "WEBP": "webp", "BMP": "bmp"}
+
+
+def scaled(size, scale):
+    return max(16, round(size[0] * scale)), max(16, round(size[1] * scale))
+
+
+def draw_image(size, rnd):
+    """An RGBA picture: gradient sky, flat 'studio' background, shapes and a noisy texture."""
+    width, height = size
+    base = Image.merge("RGB", (
+        Image.linear_gradient("L").resize(size),
+        Image.radial_gradient("L").resize(size),
+        Image.linear_gradient("L").rotate(90).resize(size),
+    )).convert("RGBA")
+
+    draw = ImageDraw.Draw(base)
+    # A white band, like the studio backdrops the background remover targets
+    draw.rectangle((0, height * 2 // 3, width, height), fill=(250, 250, 250, 255))
+    for _ in range(24):
+        x0, y0 = rnd.randrange(width), rnd.randrange(height)
+        x1, y1 = x0 + rnd.randrange(width // 4 + 1), y0 + rnd.randrange(height // 4 + 1)
+        colour = tuple(rnd.randrange(256) for _ in range(3)) + (rnd.randrange(128, 256),)
+        if rnd.random() < 0.5:
+            draw.ellipse((x0, y0, x1, y1), fill=colour)
+        else:
+            draw.rectangle((x0, y0, x1, y1), fill=colour)
+
+    # Photo-like grain over the top third (incompressible, unlike the rest)
+    band = (width, max(1, height // 3))
+    grain = Image.frombytes("L", band, rnd.randbytes(band[0] * band[1]))
+    texture = Image.merge("RGBA", (grain, grain, grain, Image.new("L", band, 48)))
+    base.alpha_composite(texture)
+    return base
+
+
+def to_mode(im, mode, size):
+    if mode == "RGBA":
+        # Transparent corners so alpha actually matters
+        alpha = Image.radial_gradient("L").resize(size).point(lambda v: 0 if v > 200 else 255)
+        im.putalpha(alpha)
+        return im
+    if mode == "P":
+        return im.convert("RGB").convert("P", palette=Image.ADAPTIVE, colors=128)
+    return im.convert(mode)
+
+
+def make_corpus(root, scale=1.0, seed=1234):
+    """Write the corpus under root and return its manifest dict."""
+    root = pathlib.Path(root)
+    rnd = random.Random(seed)
+    for sub in ("images", "heic", "mov"):
+        shutil.rmtree(root / sub, ignore_errors=True)
+        (root / sub).mkdir(parents=True)
+
+    for name, size, mode, fmt in IMAGES:
+        size = scaled(size, scale)
+        im = to_mode(draw_image(size, rnd), mode, size)
+        im.save(root / "images" / f"{name}.{EXTENSIONS[fmt]}", fmt)
+
+    try:
+        import pillow_heif
+
+        pillow_heif.register_heif_opener()
+        for name, size in HEIC:
+            size = scaled(size, scale)
+            draw_image(size, rnd).convert("RGB").save(root / "heic" / f"{name}.heic", quality=80)
+    except ImportError:
+        print("⚠️  pillow_heif not installed: no HEIC samples")
+
+    if shutil.which("ffmpeg"):
+        for name, seconds, size, vcodec, acodec in MOVIES:
+            width, height = scaled(size, scale)
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y",
+                 "-f", "lavfi", "-i", f"testsrc2=size={width // 2 * 2}x{height // 2 * 2}:rate=30:duration={seconds}",
+                 "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+                 "-c:v", vcodec, "-preset", "ultrafast", "-c:a", acodec,
+                 "-fflags", "+bitexact", "-map_metadata", "-1", str(root / "mov" / f"{name}.mov")],
+                check=True)
+    else:
+        print("⚠️  ffmpeg not found: no MOV samples")
+
+    files = {}
+    for path in sorted(root.glob("*/*")):
+        files[path.relative_to(root).as_posix()] = {
+            "bytes": path.stat().st_size,
+            "sha256": hashlib.sha256(path.read_bytes()).hexdigest(),
+        }
+    manifest = {
+        "seed": seed,
+        "scale": scale,
+        "files": files,
+        "digest": hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()[:16],
+    }
+    (root / "corpus.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def load_corpus(root, scale=1.0, seed=1234):
+    """The corpus manifest under root, generating the corpus first if it is missing or different."""
+    path = pathlib.Path(root) / "corpus.json"
+    try:
+        manifest = json.loads(path.read_text())
+        if manifest["seed"] == seed and manifest["scale"] == scale:
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    return make_corpus(root, scale, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic benchmark corpus.")
+    parser.add_argument("root", help="Directory to write the corpus to")
+    parser.add_argument("--scale", type=float, default=1.0, help="Scale factor for every image size")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    manifest = make_corpus(args.root, args.scale, args.seed)
+    total = sum(f["bytes"] for f in manifest["files"].values())
+    print(f"✅ {len(manifest['files'])} files, {total / 1e6:.1f} MB, corpus {manifest['digest']}")
+
+
+if __name__ == "__main__":
+    main()